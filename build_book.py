@@ -0,0 +1,51 @@
+import argparse
+import json
+from functools import partial
+from multiprocessing import Pool
+
+from checkers.book import write_book
+from checkers.book_builder import collect_book_positions, search_book_move, collect_game_moves
+from checkers.constants import X_SIZE, Y_SIZE, OPENING_BOOK_PATH
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Построение книги дебютов')
+    parser.add_argument('-p', '--plies', type=int, default=4, help='глубина книги (в полуходах)')
+    parser.add_argument('-d', '--depth', type=int, default=10, help='глубина поиска для каждой позиции книги')
+    parser.add_argument('-w', '--workers', type=int, default=None, help='количество процессов')
+    parser.add_argument('-g', '--games', nargs='*', default=[],
+                        help='файлы результатов selfplay.py (JSON lines) для добавления ходов победителей')
+    parser.add_argument('--size', type=int, nargs=2, default=(X_SIZE, Y_SIZE), metavar=('X', 'Y'),
+                        help='размер поля')
+    parser.add_argument('-o', '--output', default=str(OPENING_BOOK_PATH), help='файл книги')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    x_size, y_size = args.size
+    entries = {}
+
+    # Лучшие ходы по результатам глубокого поиска
+    if args.depth > 0:
+        positions = collect_book_positions(x_size, y_size, args.plies)
+        print(f'Позиций для поиска: {len(positions)}', flush=True)
+
+        search = partial(search_book_move, x_size, y_size, args.depth)
+        with Pool(args.workers) as pool:
+            for entry in pool.imap_unordered(search, positions):
+                if entry is not None:
+                    entries[entry] = entries.get(entry, 0) + 1
+
+    # Ходы победителей партий
+    for games_path in args.games:
+        with open(games_path, encoding='utf-8') as games_file:
+            results = (json.loads(line) for line in games_file if line.strip())
+            collect_game_moves(x_size, y_size, results, args.plies, entries)
+
+    write_book(args.output, x_size, y_size, entries)
+    print(f'Записей в книге: {len(entries)}')
+
+
+if __name__ == '__main__':
+    main()
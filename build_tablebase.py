@@ -0,0 +1,43 @@
+import argparse
+import os
+from functools import partial
+from multiprocessing import Pool
+from time import perf_counter
+
+from checkers.tablebase_builder import material_levels, solve_slice
+from checkers.tablebase import slice_file_name
+from checkers.constants import X_SIZE, Y_SIZE, TABLEBASE_PATH, TABLEBASE_MAX_PIECES
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Построение базы эндшпиля ретроградным анализом '
+                                                 '(уже построенные срезы пропускаются)')
+    parser.add_argument('-n', '--pieces', type=int, default=TABLEBASE_MAX_PIECES,
+                        help='наибольшее количество шашек на поле')
+    parser.add_argument('-w', '--workers', type=int, default=None, help='количество процессов')
+    parser.add_argument('--size', type=int, nargs=2, default=(X_SIZE, Y_SIZE), metavar=('X', 'Y'),
+                        help='размер поля')
+    parser.add_argument('-o', '--output', default=str(TABLEBASE_PATH), help='каталог базы')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    x_size, y_size = args.size
+    os.makedirs(args.output, exist_ok=True)
+
+    solve = partial(solve_slice, args.output, x_size, y_size)
+    with Pool(args.workers) as pool:
+        # Срезы одного уровня зависят только от срезов предыдущих уровней
+        for level in material_levels(args.pieces):
+            start_time = perf_counter()
+            missing = [material for material in level
+                       if not os.path.exists(os.path.join(args.output, slice_file_name(material)))]
+            for _ in pool.imap_unordered(solve, missing):
+                pass
+            print(f'Срезы {", ".join(slice_file_name(material) for material in level)}: '
+                  f'построено {len(missing)} за {perf_counter() - start_time:.1f} с', flush=True)
+
+
+if __name__ == '__main__':
+    main()
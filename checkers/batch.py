@@ -0,0 +1,134 @@
+from typing import NamedTuple
+
+import numpy as np
+
+from checkers.constants import MOVE_OFFSETS
+from checkers.rules import Rules, RUSSIAN_RULES
+from checkers.enums import CheckerType, SideType
+
+
+# Значения клеток массива позиций (совпадают со значениями CheckerType)
+NONE_VALUE = CheckerType.NONE.value
+WHITE_REGULAR_VALUE = CheckerType.WHITE_REGULAR.value
+BLACK_REGULAR_VALUE = CheckerType.BLACK_REGULAR.value
+WHITE_QUEEN_VALUE = CheckerType.WHITE_QUEEN.value
+BLACK_QUEEN_VALUE = CheckerType.BLACK_QUEEN.value
+
+
+class BatchAnalysis(NamedTuple):
+    '''Результат анализа пачки позиций'''
+    # Маски ходов (N, 4, Y, X): с клетки в направлении MOVE_OFFSETS[d] начинается допустимый ход
+    # (при обязательном взятии - только первые прыжки взятий)
+    move_masks: np.ndarray
+    # Флаги обязательного взятия (N,)
+    captures: np.ndarray
+    # Оценки материала с точки зрения стороны хода (N,)
+    scores: np.ndarray
+
+
+def fields_to_array(fields) -> np.ndarray:
+    '''Массив позиций (N, Y, X) типа int8 по списку полей'''
+    fields = list(fields)
+    if not fields:
+        return np.zeros((0, 0, 0), dtype=np.int8)
+
+    boards = np.full((len(fields), fields[0].y_size, fields[0].x_size), NONE_VALUE, dtype=np.int8)
+    for number, field in enumerate(fields):
+        # Заполняются только клетки с шашками (остальные уже пусты)
+        for side in (SideType.WHITE, SideType.BLACK):
+            for x, y, checker_type in field.pieces(side):
+                boards[number, y, x] = checker_type.value
+    return boards
+
+
+def shift(cells: np.ndarray, dx: int, dy: int, fill: bool = False) -> np.ndarray:
+    '''Сдвиг масок клеток (N, Y, X): результат в (y, x) - значение клетки (y + dy, x + dx)'''
+    y_size, x_size = cells.shape[1:]
+    shifted = np.full_like(cells, fill)
+    if abs(dx) >= x_size or abs(dy) >= y_size:
+        return shifted
+
+    target_y = slice(max(-dy, 0), y_size - max(dy, 0))
+    target_x = slice(max(-dx, 0), x_size - max(dx, 0))
+    source_y = slice(max(dy, 0), y_size - max(-dy, 0))
+    source_x = slice(max(dx, 0), x_size - max(-dx, 0))
+    shifted[:, target_y, target_x] = cells[:, source_y, source_x]
+    return shifted
+
+
+def material_scores(boards: np.ndarray, side: SideType) -> np.ndarray:
+    '''Оценка материала (обычная шашка - 1, дамка - 3) с точки зрения стороны'''
+    boards = np.asarray(boards)
+    white = (boards == WHITE_REGULAR_VALUE).sum(axis=(1, 2)) + 3 * (boards == WHITE_QUEEN_VALUE).sum(axis=(1, 2))
+    black = (boards == BLACK_REGULAR_VALUE).sum(axis=(1, 2)) + 3 * (boards == BLACK_QUEEN_VALUE).sum(axis=(1, 2))
+    scores = (white - black).astype(np.int32)
+    return scores if side == SideType.WHITE else -scores
+
+
+def split_boards(boards: np.ndarray, side: SideType) -> tuple:
+    '''Маски (обычные шашки стороны, дамки стороны, шашки противника, пустые клетки)'''
+    if side == SideType.WHITE:
+        regular_value, queen_value = WHITE_REGULAR_VALUE, WHITE_QUEEN_VALUE
+        enemy_values = (BLACK_REGULAR_VALUE, BLACK_QUEEN_VALUE)
+    else:
+        regular_value, queen_value = BLACK_REGULAR_VALUE, BLACK_QUEEN_VALUE
+        enemy_values = (WHITE_REGULAR_VALUE, WHITE_QUEEN_VALUE)
+
+    return (boards == regular_value, boards == queen_value,
+            np.isin(boards, enemy_values), boards == NONE_VALUE)
+
+
+def capture_masks(boards: np.ndarray, side: SideType, rules: Rules = RUSSIAN_RULES) -> np.ndarray:
+    '''Маски первых прыжков взятия (N, 4, Y, X)'''
+    boards = np.asarray(boards)
+    regular, queen, enemy, empty = split_boards(boards, side)
+    forward_dy = -1 if side == SideType.WHITE else 1
+
+    masks = np.zeros((boards.shape[0], len(MOVE_OFFSETS)) + boards.shape[1:], dtype=bool)
+    max_distance = max(boards.shape[1:])
+    for direction, (dx, dy) in enumerate(MOVE_OFFSETS):
+        # Обычная шашка (и недальнобойная дамка) бьёт через соседнюю клетку противника на пустую
+        jumpers = queen if not rules.flying_kings else np.zeros_like(queen)
+        if rules.men_capture_backwards or dy == forward_dy:
+            jumpers = jumpers | regular
+        masks[:, direction] = jumpers & shift(enemy, dx, dy) & shift(empty, 2 * dx, 2 * dy)
+        if not rules.flying_kings:
+            continue
+
+        # Дамка бьёт через первую непустую клетку луча, если это противник и за ним пусто
+        path_empty = queen.copy()
+        for distance in range(1, max_distance):
+            masks[:, direction] |= path_empty & shift(enemy, distance * dx, distance * dy) & \
+                shift(empty, (distance + 1) * dx, (distance + 1) * dy)
+            path_empty &= shift(empty, distance * dx, distance * dy)
+            if not path_empty.any():
+                break
+
+    return masks
+
+
+def quiet_masks(boards: np.ndarray, side: SideType) -> np.ndarray:
+    '''Маски ходов без взятия (N, 4, Y, X): первая клетка хода одинакова при любых правилах'''
+    boards = np.asarray(boards)
+    regular, queen, _, empty = split_boards(boards, side)
+    # Обычные шашки ходят только вперёд (белые - вверх, чёрные - вниз)
+    forward_dy = -1 if side == SideType.WHITE else 1
+
+    masks = np.zeros((boards.shape[0], len(MOVE_OFFSETS)) + boards.shape[1:], dtype=bool)
+    for direction, (dx, dy) in enumerate(MOVE_OFFSETS):
+        movers = (regular | queen) if dy == forward_dy else queen
+        masks[:, direction] = movers & shift(empty, dx, dy)
+    return masks
+
+
+def analyse_batch(boards: np.ndarray, side: SideType, rules: Rules = RUSSIAN_RULES) -> BatchAnalysis:
+    '''Анализ пачки позиций (N, Y, X) со значениями CheckerType для одной стороны хода:
+    маски допустимых ходов с учётом обязательного взятия, флаги взятия и оценки материала.
+    Правило большинства не учитывается: маски взятий - все первые прыжки'''
+    boards = np.asarray(boards, dtype=np.int8)
+
+    captures_masks = capture_masks(boards, side, rules)
+    captures = captures_masks.any(axis=(1, 2, 3))
+    move_masks = np.where(captures[:, None, None, None], captures_masks, quiet_masks(boards, side))
+
+    return BatchAnalysis(move_masks, captures, material_scores(boards, side))
@@ -0,0 +1,161 @@
+from functools import lru_cache
+
+from checkers.constants import MOVE_OFFSETS
+from checkers.point import Point
+
+
+def popcount(bits: int) -> int:
+    '''Количество установленных битов'''
+    return bin(bits).count('1')
+
+
+def iterate_bits(bits: int):
+    '''Перебор индексов установленных битов (по возрастанию)'''
+    while bits:
+        lowest_bit = bits & -bits
+        yield lowest_bit.bit_length() - 1
+        bits ^= lowest_bit
+
+
+class BoardGeometry:
+    '''Геометрия битовой доски: нумерация тёмных клеток и сдвиги по диагоналям'''
+
+    def __init__(self, x_size: int, y_size: int):
+        self.__x_size = x_size
+        self.__y_size = y_size
+
+        # Нумерация тёмных клеток построчно (слева направо, сверху вниз)
+        self.__indexes = [[-1] * x_size for y in range(y_size)]
+        self.__points = []
+        for y in range(y_size):
+            for x in range(x_size):
+                if (y + x) % 2:
+                    self.__indexes[y][x] = len(self.__points)
+                    self.__points.append(Point(x, y))
+
+        self.__squares_count = len(self.__points)
+        self.__full_mask = (1 << self.__squares_count) - 1
+
+        # Для каждого направления - список пар (маска клеток, смещение индекса)
+        self.__shifts = []
+        for offset in MOVE_OFFSETS:
+            masks = {}
+            for index, (x, y) in enumerate(self.__points):
+                if self.is_within(x + offset.x, y + offset.y):
+                    delta = self.__indexes[y + offset.y][x + offset.x] - index
+                    masks[delta] = masks.get(delta, 0) | (1 << index)
+            self.__shifts.append(tuple((mask, delta) for delta, mask in masks.items()))
+
+        # Таблицы для генерации ходов: соседние клетки, клетки приземления при взятии
+        # и полные диагональные лучи ([индекс клетки][направление], -1 - за пределами поля)
+        self.__neighbours = []
+        self.__jumps = []
+        self.__rays = []
+        self.__ray_bits = []
+        for x, y in self.__points:
+            neighbours, jumps, rays, ray_bits = [], [], [], []
+            for offset in MOVE_OFFSETS:
+                ray = []
+                shift = 1
+                while self.is_within(x + offset.x * shift, y + offset.y * shift):
+                    ray.append(self.__indexes[y + offset.y * shift][x + offset.x * shift])
+                    shift += 1
+
+                neighbours.append(ray[0] if len(ray) > 0 else -1)
+                jumps.append(ray[1] if len(ray) > 1 else -1)
+                rays.append(tuple(ray))
+                ray_bits.append(tuple(1 << index for index in ray))
+
+            self.__neighbours.append(tuple(neighbours))
+            self.__jumps.append(tuple(jumps))
+            self.__rays.append(tuple(rays))
+            self.__ray_bits.append(tuple(ray_bits))
+
+        # Маски крайних строк (для превращения в дамки)
+        self.__first_row_mask = self.row_mask(0)
+        self.__last_row_mask = self.row_mask(y_size - 1)
+
+    @property
+    def x_size(self) -> int:
+        return self.__x_size
+
+    @property
+    def y_size(self) -> int:
+        return self.__y_size
+
+    @property
+    def squares_count(self) -> int:
+        return self.__squares_count
+
+    @property
+    def full_mask(self) -> int:
+        return self.__full_mask
+
+    @property
+    def first_row_mask(self) -> int:
+        return self.__first_row_mask
+
+    @property
+    def last_row_mask(self) -> int:
+        return self.__last_row_mask
+
+    @property
+    def neighbours(self) -> list:
+        '''Соседние клетки: [индекс клетки][направление] -> индекс или -1'''
+        return self.__neighbours
+
+    @property
+    def jumps(self) -> list:
+        '''Клетки через одну по диагонали: [индекс клетки][направление] -> индекс или -1'''
+        return self.__jumps
+
+    @property
+    def rays(self) -> list:
+        '''Диагональные лучи до края поля: [индекс клетки][направление] -> индексы клеток'''
+        return self.__rays
+
+    @property
+    def ray_bits(self) -> list:
+        '''Диагональные лучи до края поля: [индекс клетки][направление] -> биты клеток'''
+        return self.__ray_bits
+
+    @property
+    def points(self) -> list:
+        '''Координаты клеток: [индекс клетки] -> Point'''
+        return self.__points
+
+    def is_within(self, x: int, y: int) -> bool:
+        '''Определяет лежит ли точка в пределах поля'''
+        return 0 <= x < self.__x_size and 0 <= y < self.__y_size
+
+    def index(self, x: int, y: int) -> int:
+        '''Индекс клетки по координатам (-1 для светлых клеток)'''
+        return self.__indexes[y][x]
+
+    def point(self, index: int) -> Point:
+        '''Координаты клетки по индексу'''
+        return self.__points[index]
+
+    def row_mask(self, y: int) -> int:
+        '''Маска всех тёмных клеток строки'''
+        mask = 0
+        for x in range(self.__x_size):
+            if self.__indexes[y][x] >= 0:
+                mask |= 1 << self.__indexes[y][x]
+        return mask
+
+    def shift(self, bits: int, direction: int) -> int:
+        '''Сдвиг всех битов на одну клетку в направлении MOVE_OFFSETS[direction]'''
+        result = 0
+        for mask, delta in self.__shifts[direction]:
+            if delta > 0:
+                result |= (bits & mask) << delta
+            else:
+                result |= (bits & mask) >> -delta
+        return result
+
+
+@lru_cache(maxsize=None)
+def get_geometry(x_size: int, y_size: int) -> BoardGeometry:
+    '''Получение (единственной для каждого размера) геометрии доски'''
+    return BoardGeometry(x_size, y_size)
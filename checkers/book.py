@@ -0,0 +1,112 @@
+import mmap
+import struct
+import zlib
+from functools import lru_cache
+from pathlib import Path
+
+from checkers.move import Move
+from checkers.enums import SideType
+from checkers.zobrist import position_key
+
+
+# Формат файла: заголовок, затем записи, отсортированные по ключу позиции
+BOOK_MAGIC = b'CHKBOOK1'
+# Заголовок: метка формата, размер поля по x и y, количество записей
+BOOK_HEADER = struct.Struct('<8sBBxxI')
+# Запись: ключ позиции (с учётом очерёдности хода), код хода, вес хода, резерв
+BOOK_ENTRY = struct.Struct('<QIHH')
+
+# Максимальный вес хода в книге
+MAX_BOOK_WEIGHT = 0xFFFF
+
+
+def move_code(move: Move) -> int:
+    '''Код хода, не зависящий от порядка генерации ходов (CRC32 от всех клеток остановки)'''
+    coordinates = [move.from_x, move.from_y]
+    for x, y in move.path:
+        coordinates += [x, y]
+    coordinates += [move.to_x, move.to_y]
+    return zlib.crc32(bytes(coordinates))
+
+
+def write_book(path, x_size: int, y_size: int, entries: dict):
+    '''Запись книги дебютов: entries - {(ключ позиции, код хода): вес}'''
+    with open(path, 'wb') as book_file:
+        book_file.write(BOOK_HEADER.pack(BOOK_MAGIC, x_size, y_size, len(entries)))
+        for (key, code), weight in sorted(entries.items()):
+            book_file.write(BOOK_ENTRY.pack(key, code, min(weight, MAX_BOOK_WEIGHT), 0))
+
+
+class OpeningBook:
+    '''Книга дебютов, отображённая в память (страницы файла разделяются всеми процессами)'''
+
+    def __init__(self, path):
+        with open(path, 'rb') as book_file:
+            self.__mmap = mmap.mmap(book_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self.__x_size, self.__y_size, self.__entries_count = BOOK_HEADER.unpack_from(self.__mmap, 0)
+        if magic != BOOK_MAGIC or BOOK_HEADER.size + self.__entries_count * BOOK_ENTRY.size > len(self.__mmap):
+            self.__mmap.close()
+            raise ValueError(f'Файл {path} не является книгой дебютов')
+
+    @property
+    def x_size(self) -> int:
+        return self.__x_size
+
+    @property
+    def y_size(self) -> int:
+        return self.__y_size
+
+    @property
+    def entries_count(self) -> int:
+        return self.__entries_count
+
+    def close(self):
+        self.__mmap.close()
+
+    def __entry(self, index: int) -> tuple:
+        '''Запись по номеру: (ключ, код хода, вес, резерв)'''
+        return BOOK_ENTRY.unpack_from(self.__mmap, BOOK_HEADER.size + index * BOOK_ENTRY.size)
+
+    def probe(self, key: int) -> list:
+        '''Ходы книги для позиции: [(код хода, вес)]'''
+        # Двоичный поиск первой записи с ключом позиции
+        low, high = 0, self.__entries_count
+        while low < high:
+            middle = (low + high) // 2
+            if self.__entry(middle)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+
+        moves = []
+        while low < self.__entries_count:
+            entry_key, code, weight, _ = self.__entry(low)
+            if entry_key != key:
+                break
+            moves.append((code, weight))
+            low += 1
+        return moves
+
+    def find_move(self, game, side: SideType) -> Move:
+        '''Ход из книги с наибольшим весом (None, если позиции нет в книге)'''
+        if game.field.x_size != self.__x_size or game.field.y_size != self.__y_size:
+            return None
+
+        book_moves = self.probe(position_key(game.field, side))
+        if not book_moves:
+            return None
+
+        moves_by_code = {move_code(move): move for move in game.get_legal_moves(side)}
+        for code, weight in sorted(book_moves, key=lambda book_move: book_move[1], reverse=True):
+            if code in moves_by_code:
+                return moves_by_code[code]
+        return None
+
+
+@lru_cache(maxsize=None)
+def get_opening_book(path) -> OpeningBook:
+    '''Книга дебютов (одна на процесс) или None, если файла нет'''
+    if not Path(path).is_file():
+        return None
+    return OpeningBook(path)
@@ -0,0 +1,67 @@
+from checkers.game import Game
+from checkers.search import Search
+from checkers.book import move_code
+from checkers.evaluation import get_evaluator
+from checkers.constants import EVALUATION_WEIGHTS_PATH
+from checkers.enums import SideType
+from checkers.zobrist import position_key
+
+
+def collect_book_positions(x_size: int, y_size: int, plies: int) -> list:
+    '''Все различные позиции первых plies полуходов: [(ходы от начальной позиции, сторона хода)]'''
+    game = Game(x_size, y_size)
+    positions = []
+    seen_keys = set()
+
+    def collect(moves: list, side: SideType):
+        key = position_key(game.field, side)
+        if key in seen_keys:
+            return
+        seen_keys.add(key)
+        positions.append((list(moves), side))
+
+        if len(moves) >= plies:
+            return
+        for move in game.get_moves_list(side):
+            game.make_move(move)
+            collect(moves + [move], SideType.opposite(side))
+            game.unmake_move()
+
+    collect([], SideType.WHITE)
+    return positions
+
+
+def search_book_move(x_size: int, y_size: int, max_depth: int, position: tuple) -> tuple:
+    '''Поиск лучшего хода позиции для книги: (ключ позиции, код хода) или None'''
+    moves, side = position
+    game = Game(x_size, y_size)
+    for move in moves:
+        game.make_move(move)
+
+    # Поиск без обращения к уже существующей книге
+    best_move = Search(game, game.transposition_table,
+                       evaluator=get_evaluator(EVALUATION_WEIGHTS_PATH)).search(side, max_depth)
+    if best_move is None:
+        return None
+    return position_key(game.field, side), move_code(best_move)
+
+
+def collect_game_moves(x_size: int, y_size: int, results: list, plies: int, entries: dict):
+    '''Добавление в книгу первых ходов победителей партий (результатов headless.play_game)'''
+    for result in results:
+        if result['winner'] == 'draw':
+            continue
+
+        game = Game(x_size, y_size)
+        side = SideType.WHITE
+        for turn in result['turns'][:plies]:
+            move = game.find_move(side, turn)
+            if move is None:
+                break
+
+            if side.name.lower() == result['winner']:
+                key = (position_key(game.field, side), move_code(move))
+                entries[key] = entries.get(key, 0) + 1
+
+            game.make_move(move)
+            side = SideType.opposite(side)
@@ -12,3 +12,20 @@ class Checker:
     def change_type(self, type: CheckerType):
         '''Изменение типа шашки'''
         self.__type = type
+
+
+class FieldChecker(Checker):
+    '''Шашка, привязанная к клетке битового поля'''
+
+    def __init__(self, field, x: int, y: int):
+        self.__field = field
+        self.__x = x
+        self.__y = y
+
+    @property
+    def type(self):
+        return self.__field.type_at(self.__x, self.__y)
+
+    def change_type(self, type: CheckerType):
+        '''Изменение типа шашки'''
+        self.__field.set_type_at(self.__x, self.__y, type)
@@ -1,3 +1,5 @@
+from pathlib import Path
+
 from checkers.point import Point
 from checkers.enums import CheckerType, SideType
 
@@ -12,9 +14,15 @@ CELL_SIZE = 75
 
 # Скорость анимации (больше = быстрее)
 ANIMATION_SPEED = 4
+# Задержка между кадрами анимации (в миллисекундах)
+ANIMATION_FRAME_DELAY = 10
+# Период проверки завершения поиска хода компьютера (в миллисекундах)
+SEARCH_POLL_INTERVAL = 50
 
-# Количество ходов для предсказания
-MAX_PREDICTION_DEPTH = 3
+# Глубина поиска оптимального хода (в полуходах)
+MAX_PREDICTION_DEPTH = 8
+# Предельная глубина поиска с ограничением по времени
+MAX_SEARCH_DEPTH = 64
 
 # Ширина рамки (Желательно должна быть чётной)
 BORDER_WIDTH = 2 * 2
@@ -39,3 +47,40 @@ MOVE_OFFSETS = [
 # Массивы типов белых и чёрных шашек [Обычная пешка, дамка]
 WHITE_CHECKERS = [CheckerType.WHITE_REGULAR, CheckerType.WHITE_QUEEN]
 BLACK_CHECKERS = [CheckerType.BLACK_REGULAR, CheckerType.BLACK_QUEEN]
+
+# Оценка выигранной позиции
+WIN_SCORE = 100000
+
+# Предельная глубина поиска только по взятиям после основного поиска (в полуходах, 0 - без него)
+QUIESCENCE_MAX_DEPTH = 8
+
+# Размер таблицы транспозиций (в мегабайтах)
+TRANSPOSITION_TABLE_SIZE = 64
+
+# Количество процессов поиска хода (1 - поиск в одном процессе)
+SEARCH_WORKERS = 1
+
+# Предельное количество ходов в партии без участия игрока (после него - ничья)
+MAX_GAME_TURNS = 200
+# Количество первых ходов, выбираемых случайно в партиях без участия игрока
+RANDOM_OPENING_TURNS = 4
+
+# Проверять счётчики шашек полным пересчётом после каждого хода (для отладки)
+DEBUG_CHECKS = False
+
+# Книга дебютов (если файла нет, ходы всегда ищутся поиском)
+OPENING_BOOK_PATH = Path('assets', 'opening-book.bin')
+USE_OPENING_BOOK = True
+
+# База эндшпиля (каталог срезов; если его нет, эндшпиль считается поиском)
+TABLEBASE_PATH = Path('assets', 'tablebase')
+# Наибольшее количество шашек на поле для позиций базы
+TABLEBASE_MAX_PIECES = 3
+USE_TABLEBASE = True
+
+# Журнал сыгранных партий (партии с игроком дописываются в конец после окончания)
+GAME_LOG_PATH = Path('records', 'games.log')
+RECORD_GAMES = True
+
+# Веса признаков оценки позиции (если файла нет, используются веса по умолчанию)
+EVALUATION_WEIGHTS_PATH = Path('assets', 'evaluation-weights.json')
@@ -1,9 +1,12 @@
 from tkinter import Canvas, Event, messagebox
 from PIL import Image, ImageTk
 from pathlib import Path
-from time import sleep
+import traceback
 
-from checkers.move import Move
+from checkers.move import Move, MoveSet
+from checkers.worker import SearchWorker
+from checkers.records import record_from_game, append_records
+from checkers.bitboard import iterate_bits
 from checkers.constants import *
 from checkers.enums import CheckerType, SideType
 from checkers.game import Game
@@ -18,7 +21,14 @@ class UI:
         self.__selected_cell = Point()
         self.__animated_cell = Point()
 
+        # Ходы игрока, совпадающие с уже сделанными прыжками текущего хода (None - ход ещё не начат)
+        self.__player_moves = None
+
+        # Фоновый поиск хода компьютера (None - компьютер не думает)
+        self.__search_worker = None
+
         self.__init_images()
+        self.__init_canvas_items()
 
         self.__draw()
 
@@ -36,8 +46,41 @@ class UI:
                 Image.open(Path('assets', 'black-queen.png')).resize((CELL_SIZE, CELL_SIZE), Image.ANTIALIAS)),
         }
 
-    def __animate_move(self, move: Move):
-        '''Анимация перемещения шашки'''
+    def __init_canvas_items(self):
+        '''Создание постоянных элементов холста (далее они только изменяются)'''
+        field = self.__game.field
+
+        for y in range(field.y_size):
+            for x in range(field.x_size):
+                self.__canvas.create_rectangle(x * CELL_SIZE, y * CELL_SIZE, x * CELL_SIZE + CELL_SIZE,
+                                               y * CELL_SIZE + CELL_SIZE, fill=FIELD_COLORS[(y + x) % 2], width=0,
+                                               tag='boards')
+
+        # Рамки выделенной ячейки и ячейки под мышкой
+        self.__select_border = self.__canvas.create_rectangle(0, 0, 0, 0, outline=SELECT_BORDER_COLOR,
+                                                              width=BORDER_WIDTH, state='hidden', tag='border')
+        self.__hover_border = self.__canvas.create_rectangle(0, 0, 0, 0, outline=HOVER_BORDER_COLOR,
+                                                             width=BORDER_WIDTH, state='hidden', tag='border')
+
+        # Кружки возможных ходов (по клеткам) и показанные сейчас
+        self.__move_circles = {}
+        self.__shown_move_circles = set()
+
+        # Изображения шашек на тёмных клетках (скрыты на пустых клетках)
+        self.__checker_items = []
+        for x, y in field.geometry.points:
+            self.__checker_items.append(self.__canvas.create_image(x * CELL_SIZE, y * CELL_SIZE, anchor='nw',
+                                                                   state='hidden', tag='checkers'))
+
+        # Отрисованное состояние поля: битовые маски по типам шашек (None - ничего не отрисовано)
+        self.__drawn_bits = None
+
+    def __animate_move(self, move: Move, on_finished):
+        '''Анимация перемещения шашки (кадры по таймеру) с последующим совершением прыжка
+
+        Прыжок совершается только для отображения: посреди цепочки взятия шашка превращается в дамку,
+        только если это допускают правила, а по окончании цепочки прыжки заменяются целым ходом
+        '''
         self.__animated_cell = Point(move.from_x, move.from_y)
         self.__draw()
 
@@ -51,64 +94,114 @@ class UI:
         dx = 1 if move.from_x < move.to_x else -1
         dy = 1 if move.from_y < move.to_y else -1
 
-        # Анимация
-        for distance in range(abs(move.from_x - move.to_x)):
-            for _ in range(100 // ANIMATION_SPEED):
-                self.__canvas.move(animated_checker, ANIMATION_SPEED / 100 * CELL_SIZE * dx,
-                                   ANIMATION_SPEED / 100 * CELL_SIZE * dy)
-                self.__canvas.update()
-                sleep(0.01)
+        frames_count = abs(move.from_x - move.to_x) * (100 // ANIMATION_SPEED)
+        self.__animate_frame(move, animated_checker, dx, dy, frames_count, on_finished)
+
+    def __animate_frame(self, move: Move, animated_checker: int, dx: int, dy: int, frames_left: int, on_finished):
+        '''Кадр анимации'''
+        if frames_left > 0:
+            self.__canvas.move(animated_checker, ANIMATION_SPEED / 100 * CELL_SIZE * dx,
+                               ANIMATION_SPEED / 100 * CELL_SIZE * dy)
+            self.__canvas.after(ANIMATION_FRAME_DELAY, self.__animate_frame,
+                                move, animated_checker, dx, dy, frames_left - 1, on_finished)
+            return
 
+        self.__canvas.delete(animated_checker)
         self.__animated_cell = Point()
+        self.__game.make_move(move, self.__game.rules.promote_during_capture)
+        self.__draw()
+
+        on_finished()
+
+    def __animate_moves(self, moves_list: list, on_finished):
+        '''Последовательная анимация и совершение ходов (прыжков)'''
+        if not moves_list:
+            on_finished()
+            return
+
+        self.__animate_move(moves_list[0], lambda: self.__animate_moves(moves_list[1:], on_finished))
+
+    def __complete_move(self, move: Move):
+        '''Замена совершённых для отображения прыжков целым ходом (превращение в дамку - по правилам всего хода)'''
+        for _ in move.steps:
+            self.__game.unmake_move()
+        self.__game.make_move(move)
+        self.__draw()
 
     def __draw(self):
-        '''Отрисовка сетки поля и шашек'''
-        self.__canvas.delete('all')
-        self.__draw_field_grid()
+        '''Обновление шашек, рамок и кружков возможных ходов (изменяются только отличающиеся элементы)'''
         self.__draw_checkers()
+        self.__draw_borders()
+        self.__draw_move_circles()
+
+    def __draw_borders(self):
+        '''Перемещение рамок выделенной ячейки и ячейки под мышкой'''
+        selected_cell, hovered_cell = self.__selected_cell, self.__hovered_cell
+        self.__place_border(self.__select_border, selected_cell)
+        self.__place_border(self.__hover_border, Point() if hovered_cell == selected_cell else hovered_cell)
+
+    def __place_border(self, border: int, cell: Point):
+        '''Перемещение рамки к ячейке (скрытие, если ячейка за пределами поля)'''
+        if not self.__game.field.is_within(cell.x, cell.y):
+            self.__canvas.itemconfig(border, state='hidden')
+            return
 
-    def __draw_field_grid(self):
-        '''Отрисовка сетки поля'''
-        for y in range(self.__game.field.y_size):
-            for x in range(self.__game.field.x_size):
-                self.__canvas.create_rectangle(x * CELL_SIZE, y * CELL_SIZE, x * CELL_SIZE + CELL_SIZE,
-                                               y * CELL_SIZE + CELL_SIZE, fill=FIELD_COLORS[(y + x) % 2], width=0,
-                                               tag='boards')
+        self.__canvas.coords(border, cell.x * CELL_SIZE + BORDER_WIDTH // 2, cell.y * CELL_SIZE + BORDER_WIDTH // 2,
+                             cell.x * CELL_SIZE + CELL_SIZE - BORDER_WIDTH // 2,
+                             cell.y * CELL_SIZE + CELL_SIZE - BORDER_WIDTH // 2)
+        self.__canvas.itemconfig(border, state='normal')
+
+    def __draw_move_circles(self):
+        '''Отрисовка возможных точек перемещения выбранной шашки'''
+        targets = set()
+        if self.__game.player_turn and self.__game.field.is_within(self.__selected_cell.x, self.__selected_cell.y):
+            targets = set(self.__get_player_moves().targets(self.__selected_cell.x, self.__selected_cell.y))
+
+        for x, y in self.__shown_move_circles - targets:
+            self.__canvas.itemconfig(self.__move_circles[(x, y)], state='hidden')
+
+        for x, y in targets - self.__shown_move_circles:
+            if (x, y) not in self.__move_circles:
+                self.__move_circles[(x, y)] = self.__canvas.create_oval(
+                    x * CELL_SIZE + CELL_SIZE / 3, y * CELL_SIZE + CELL_SIZE / 3,
+                    x * CELL_SIZE + (CELL_SIZE - CELL_SIZE / 3), y * CELL_SIZE + (CELL_SIZE - CELL_SIZE / 3),
+                    fill=POSIBLE_MOVE_CIRCLE_COLOR, width=0, tag='posible_move_circle')
+            else:
+                self.__canvas.itemconfig(self.__move_circles[(x, y)], state='normal')
 
-                # Отрисовка рамок у необходимых клеток
-                if x == self.__selected_cell.x and y == self.__selected_cell.y:
-                    self.__canvas.create_rectangle(x * CELL_SIZE + BORDER_WIDTH // 2, y * CELL_SIZE + BORDER_WIDTH // 2,
-                                                   x * CELL_SIZE + CELL_SIZE - BORDER_WIDTH // 2,
-                                                   y * CELL_SIZE + CELL_SIZE - BORDER_WIDTH // 2,
-                                                   outline=SELECT_BORDER_COLOR, width=BORDER_WIDTH, tag='border')
-                elif x == self.__hovered_cell.x and y == self.__hovered_cell.y:
-                    self.__canvas.create_rectangle(x * CELL_SIZE + BORDER_WIDTH // 2, y * CELL_SIZE + BORDER_WIDTH // 2,
-                                                   x * CELL_SIZE + CELL_SIZE - BORDER_WIDTH // 2,
-                                                   y * CELL_SIZE + CELL_SIZE - BORDER_WIDTH // 2,
-                                                   outline=HOVER_BORDER_COLOR, width=BORDER_WIDTH, tag='border')
-
-                # Отрисовка возможных точек перемещения, если есть выбранная ячейка
-                if self.__selected_cell:
-                    player_moves_list = self.__game.get_moves_list(PLAYER_SIDE)
-                    for move in player_moves_list:
-                        if self.__selected_cell.x == move.from_x and self.__selected_cell.y == move.from_y:
-                            self.__canvas.create_oval(move.to_x * CELL_SIZE + CELL_SIZE / 3,
-                                                      move.to_y * CELL_SIZE + CELL_SIZE / 3,
-                                                      move.to_x * CELL_SIZE + (CELL_SIZE - CELL_SIZE / 3),
-                                                      move.to_y * CELL_SIZE + (CELL_SIZE - CELL_SIZE / 3),
-                                                      fill=POSIBLE_MOVE_CIRCLE_COLOR, width=0,
-                                                      tag='posible_move_circle')
+        self.__shown_move_circles = targets
 
     def __draw_checkers(self):
-        '''Отрисовка шашек'''
-        for y in range(self.__game.field.y_size):
-            for x in range(self.__game.field.x_size):
-                # Не отрисовывать пустые ячейки и анимируемую шашку
-                if self.__game.field.type_at(x, y) != CheckerType.NONE and not (
-                        x == self.__animated_cell.x and y == self.__animated_cell.y):
-                    self.__canvas.create_image(x * CELL_SIZE, y * CELL_SIZE,
-                                               image=self.__images.get(self.__game.field.type_at(x, y)), anchor='nw',
-                                               tag='checkers')
+        '''Обновление изображений шашек на клетках, изменившихся с прошлой отрисовки'''
+        field = self.__game.field
+        geometry = field.geometry
+
+        # Анимируемая шашка на своей клетке не отображается
+        animated_bit = 0
+        if field.is_within(self.__animated_cell.x, self.__animated_cell.y):
+            animated_bit = 1 << geometry.index(self.__animated_cell.x, self.__animated_cell.y)
+
+        bits = tuple(checker_bits & ~animated_bit for checker_bits in (
+            field.white_regular_bits, field.black_regular_bits, field.white_queen_bits, field.black_queen_bits))
+        if bits == self.__drawn_bits:
+            return
+
+        if self.__drawn_bits is None:
+            changed_bits = geometry.full_mask
+        else:
+            changed_bits = 0
+            for drawn_bits, checker_bits in zip(self.__drawn_bits, bits):
+                changed_bits |= drawn_bits ^ checker_bits
+        self.__drawn_bits = bits
+
+        for index in iterate_bits(changed_bits):
+            x, y = geometry.point(index)
+            checker_type = field.type_at(x, y) if not animated_bit >> index & 1 else CheckerType.NONE
+            if checker_type == CheckerType.NONE:
+                self.__canvas.itemconfig(self.__checker_items[index], state='hidden')
+            else:
+                self.__canvas.itemconfig(self.__checker_items[index], image=self.__images.get(checker_type),
+                                         state='normal')
 
     def mouse_move(self, event: Event):
         '''Событие перемещения мышки'''
@@ -131,108 +224,143 @@ class UI:
         if not self.__game.field.is_within(x, y):
             return
 
-        if PLAYER_SIDE == SideType.WHITE:
-            player_checkers = WHITE_CHECKERS
-        elif PLAYER_SIDE == SideType.BLACK:
-            player_checkers = BLACK_CHECKERS
-        else:
-            return
-
         # Если нажатие по шашке игрока, то выбрать её
-        if self.__game.field.type_at(x, y) in player_checkers:
+        index = self.__game.field.geometry.index(x, y)
+        if index >= 0 and self.__game.field.side_bits(PLAYER_SIDE) >> index & 1:
             self.__selected_cell = Point(x, y)
             self.__draw()
         elif self.__game.player_turn:
-            move = Move(self.__selected_cell.x, self.__selected_cell.y, x, y)
+            # Прыжок игрока по начальной и конечной клеткам
+            step = self.__get_player_moves().find_step(self.__selected_cell.x, self.__selected_cell.y, x, y)
 
             # Если нажатие по ячейке, на которую можно походить
-            if move in self.__game.get_moves_list(PLAYER_SIDE):
-                self.__handle_player_turn(move)
-
-                # Если не ход игрока, то ход противника
-                if not self.__game.player_turn:
-                    self.__handle_enemy_turn()
-
-    def __handle_move(self, move: Move, draw: bool = True) -> bool:
-        '''Совершение хода'''
-        if draw: self.__animate_move(move)
+            if step is not None:
+                self.__handle_player_turn(step)
+
+    def move_now(self, event: Event = None):
+        '''Заставить компьютер походить сразу (лучшим ходом из уже просмотренных)'''
+        if self.__search_worker is not None:
+            self.__search_worker.move_now()
+
+    def cancel_search(self):
+        '''Отмена поиска хода компьютера (например, при закрытии окна)'''
+        if self.__search_worker is not None:
+            self.__search_worker.cancel()
+            self.__search_worker = None
+
+    def __get_player_moves(self) -> MoveSet:
+        '''Возможные ходы игрока (с учётом уже сделанных прыжков текущего хода)'''
+        if self.__player_moves is None:
+            self.__player_moves = self.__game.get_legal_moves(PLAYER_SIDE)
+        return self.__player_moves
+
+    def __reset_player_moves(self):
+        '''Сброс ходов игрока (при смене позиции)'''
+        self.__player_moves = None
+
+    def __handle_player_turn(self, step: Move):
+        '''Обработка хода (прыжка) игрока'''
+        self.__game.player_turn = False
+        self.__selected_cell = Point()
 
-        # Изменение типа шашки, если она дошла до края
-        if move.to_y == 0 and self.__game.field.type_at(move.from_x, move.from_y) == CheckerType.WHITE_REGULAR:
-            self.__game.field.at(move.from_x, move.from_y).change_type(CheckerType.WHITE_QUEEN)
-        elif self.__game.field.y_size - 1 == move.to_y and \
-                self.__game.field.type_at(move.from_x, move.from_y) == CheckerType.BLACK_REGULAR:
-            self.__game.field.at(move.from_x, move.from_y).change_type(CheckerType.BLACK_QUEEN)
+        self.__animate_move(step, lambda: self.__finish_player_turn(step))
 
-        # Изменение позиции шашки
-        self.__game.field.at(move.to_x, move.to_y).change_type(self.__game.field.type_at(move.from_x, move.from_y))
-        self.__game.field.at(move.from_x, move.from_y).change_type(CheckerType.NONE)
+    def __finish_player_turn(self, step: Move):
+        '''Завершение прыжка игрока (после анимации)'''
+        self.__player_moves = self.__player_moves.after_step(step)
 
-        # Вектора движения
-        dx = -1 if move.from_x < move.to_x else 1
-        dy = -1 if move.from_y < move.to_y else 1
-
-        # Удаление съеденных шашек
-        has_killed_checker = False
-        x, y = move.to_x, move.to_y
-        while x != move.from_x or y != move.from_y:
-            x += dx
-            y += dy
-            if self.__game.field.type_at(x, y) != CheckerType.NONE:
-                self.__game.field.at(x, y).change_type(CheckerType.NONE)
-                has_killed_checker = True
-
-        if draw:
+        # Если есть ещё ход этой же шашкой
+        if not self.__player_moves.is_finished():
+            self.__game.player_turn = True
             self.__draw()
+        else:
+            self.__complete_move(self.__player_moves[0])
+            self.__reset_player_moves()
+            self.__handle_enemy_turn()
 
-        return has_killed_checker
-
-    def __handle_player_turn(self, move: Move):
-        '''Обработка хода игрока'''
+    def __handle_enemy_turn(self):
+        '''Обработка хода противника (компьютера): поиск в фоновом потоке с опросом по таймеру'''
         self.__game.player_turn = False
 
-        # Была ли убита шашка
-        has_killed_checker = self.__handle_move(move)
+        self.__search_worker = SearchWorker(self.__game, SideType.opposite(PLAYER_SIDE))
+        self.__search_worker.start()
+        self.__canvas.after(SEARCH_POLL_INTERVAL, self.__poll_enemy_turn, self.__search_worker)
 
-        required_moves_list = list(
-            filter(lambda required_move: move.to_x == required_move.from_x and move.to_y == required_move.from_y,
-                   self.__game.get_required_moves_list(PLAYER_SIDE)))
+    def __poll_enemy_turn(self, search_worker: SearchWorker):
+        '''Проверка завершения поиска хода компьютера'''
+        # Поиск отменён
+        if search_worker is not self.__search_worker:
+            return
 
-        # Если есть ещё ход этой же шашкой
-        if has_killed_checker and required_moves_list:
-            self.__game.player_turn = True
+        if not search_worker.is_done():
+            self.__canvas.after(SEARCH_POLL_INTERVAL, self.__poll_enemy_turn, search_worker)
+            return
 
-        self.__selected_cell = Point()
+        self.__search_worker = None
+
+        # Ошибка поиска не должна выглядеть как отсутствие ходов: поиск повторяется или начинается новая игра
+        # (исключение не выбрасывается из обработчика таймера Tk - иначе игра остановилась бы без хода)
+        if search_worker.error is not None:
+            error = search_worker.error
+            traceback.print_exception(type(error), error, error.__traceback__)
+            if messagebox.askretrycancel('Ошибка', f'Не удалось найти ход компьютера: {error}\n\n'
+                                                   'Повторить поиск? (Отмена - новая игра)'):
+                self.__handle_enemy_turn()
+            else:
+                self.__new_game()
+            return
 
-    def __handle_enemy_turn(self):
-        '''Обработка хода противника (компьютера)'''
-        self.__game.player_turn = False
+        optimal_move = search_worker.move
+        if optimal_move is None:
+            self.__finish_enemy_turn()
+            return
 
-        optimal_moves_list = self.__game.predict_optimal_moves(SideType.opposite(PLAYER_SIDE))
+        self.__animate_moves(optimal_move.steps, lambda: self.__finish_enemy_turn(optimal_move))
 
-        for move in optimal_moves_list:
-            self.__handle_move(move)
+    def __finish_enemy_turn(self, move: Move = None):
+        '''Завершение хода противника (после анимации)'''
+        if move is not None:
+            self.__complete_move(move)
 
+        self.__reset_player_moves()
         self.__game.player_turn = True
+        self.__draw()
 
         self.__check_for_game_over()
 
     def __check_for_game_over(self):
         '''Проверка на конец игры'''
         game_over = False
+        winner = None
 
-        white_moves_list = self.__game.get_moves_list(SideType.WHITE)
+        white_moves_list = self.__game.get_legal_moves(SideType.WHITE)
         if not white_moves_list:
             # Белые проиграли
             answer = messagebox.showinfo('Конец игры', 'Чёрные выиграли')
             game_over = True
+            winner = 'black'
 
-        black_moves_list = self.__game.get_moves_list(SideType.BLACK)
+        black_moves_list = self.__game.get_legal_moves(SideType.BLACK)
         if not black_moves_list:
             # Чёрные проиграли
             answer = messagebox.showinfo('Конец игры', 'Белые выиграли')
             game_over = True
+            winner = 'white'
 
         if game_over:
-            # Новая игра
-            self.__game.__init__(self.__game.field.x_size, self.__game.field.y_size)
+            # Сохранение партии до её сброса
+            # (ошибка записи не мешает начать новую игру)
+            if RECORD_GAMES:
+                try:
+                    append_records(GAME_LOG_PATH, [record_from_game(self.__game, winner)])
+                except OSError as error:
+                    messagebox.showwarning('Журнал партий', f'Не удалось сохранить партию в {GAME_LOG_PATH}: {error}')
+
+            self.__new_game()
+
+    def __new_game(self):
+        '''Начало новой игры с теми же размером поля и правилами (первым ходит игрок)'''
+        self.__game.__init__(self.__game.field.x_size, self.__game.field.y_size, self.__game.rules)
+        self.__selected_cell = Point()
+        self.__reset_player_moves()
+        self.__draw()
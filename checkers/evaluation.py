@@ -0,0 +1,166 @@
+import json
+from functools import lru_cache
+from pathlib import Path
+
+from checkers.bitboard import popcount, iterate_bits, get_geometry
+from checkers.enums import SideType
+
+
+# Признаки оценки (значение признака - разница между белыми и чёрными):
+# man - обычные шашки, king - дамки, mobility - ходы без взятия на соседнюю клетку,
+# back_rank - обычные шашки на своей первой строке (защита от превращения противника),
+# centre - шашки в центре поля, runaway - обычные шашки, которых не может задержать противник,
+# tempo - продвижение обычных шашек к строке превращения (в строках)
+FEATURE_NAMES = ('man', 'king', 'mobility', 'back_rank', 'centre', 'runaway', 'tempo')
+
+# Веса по умолчанию (обычная шашка - 100)
+DEFAULT_WEIGHTS = {
+    'man': 100,
+    'king': 300,
+    'mobility': 2,
+    'back_rank': 8,
+    'centre': 4,
+    'runaway': 40,
+    'tempo': 2,
+}
+
+
+class EvaluationMasks:
+    '''Маски клеток для признаков оценки'''
+
+    def __init__(self, x_size: int, y_size: int):
+        geometry = get_geometry(x_size, y_size)
+        self.__geometry = geometry
+
+        # Центр - клетки не ближе двух строк и столбцов к краю поля
+        self.__centre_mask = 0
+        for index, (x, y) in enumerate(geometry.points):
+            if 2 <= x < x_size - 2 and 2 <= y < y_size - 2:
+                self.__centre_mask |= 1 << index
+
+        # Строки поля и продвижение по ним (белые идут к строке 0, чёрные - к последней)
+        self.__rows = [(geometry.row_mask(y), y_size - 1 - y, y) for y in range(y_size)]
+
+        # Конусы впереди обычных шашек: клетки, из которых противник успевает перехватить шашку
+        self.__white_cones = []
+        self.__black_cones = []
+        for x, y in geometry.points:
+            white_cone, black_cone = 0, 0
+            for index, (cone_x, cone_y) in enumerate(geometry.points):
+                if cone_y < y and abs(cone_x - x) <= y - cone_y:
+                    white_cone |= 1 << index
+                if cone_y > y and abs(cone_x - x) <= cone_y - y:
+                    black_cone |= 1 << index
+            self.__white_cones.append(white_cone)
+            self.__black_cones.append(black_cone)
+
+    @property
+    def geometry(self):
+        return self.__geometry
+
+    @property
+    def centre_mask(self) -> int:
+        return self.__centre_mask
+
+    @property
+    def rows(self) -> list:
+        '''[(маска строки, продвижение белых, продвижение чёрных)]'''
+        return self.__rows
+
+    @property
+    def white_cones(self) -> list:
+        return self.__white_cones
+
+    @property
+    def black_cones(self) -> list:
+        return self.__black_cones
+
+
+@lru_cache(maxsize=None)
+def get_evaluation_masks(x_size: int, y_size: int) -> EvaluationMasks:
+    '''Получение (единственных для каждого размера доски) масок признаков'''
+    return EvaluationMasks(x_size, y_size)
+
+
+def extract_features(field) -> list:
+    '''Значения признаков позиции (в порядке FEATURE_NAMES) с точки зрения белых'''
+    masks = get_evaluation_masks(field.x_size, field.y_size)
+    geometry = masks.geometry
+
+    white_regular, white_queen = field.white_regular_bits, field.white_queen_bits
+    black_regular, black_queen = field.black_regular_bits, field.black_queen_bits
+    white_bits, black_bits = white_regular | white_queen, black_regular | black_queen
+    empty_bits = field.empty_bits
+
+    # Подвижность: обычные шашки ходят вперёд (белые - направления 0 и 1, чёрные - 2 и 3), дамки - во все стороны
+    mobility = 0
+    for direction in range(4):
+        white_movers = white_bits if direction < 2 else white_queen
+        black_movers = black_bits if direction >= 2 else black_queen
+        mobility += popcount(geometry.shift(white_movers, direction) & empty_bits)
+        mobility -= popcount(geometry.shift(black_movers, direction) & empty_bits)
+
+    back_rank = popcount(white_regular & geometry.last_row_mask) - popcount(black_regular & geometry.first_row_mask)
+    centre = popcount(white_bits & masks.centre_mask) - popcount(black_bits & masks.centre_mask)
+
+    runaway = 0
+    for index in iterate_bits(white_regular):
+        if not masks.white_cones[index] & black_bits:
+            runaway += 1
+    for index in iterate_bits(black_regular):
+        if not masks.black_cones[index] & white_bits:
+            runaway -= 1
+
+    tempo = 0
+    for row_mask, white_advance, black_advance in masks.rows:
+        tempo += popcount(white_regular & row_mask) * white_advance - popcount(black_regular & row_mask) * black_advance
+
+    return [field.white_regular_count - field.black_regular_count,
+            field.white_queen_count - field.black_queen_count,
+            mobility, back_rank, centre, runaway, tempo]
+
+
+def load_weights(path) -> dict:
+    '''Загрузка весов признаков из JSON (недостающие берутся по умолчанию; если файла нет - все)'''
+    weights = dict(DEFAULT_WEIGHTS)
+    if not Path(path).is_file():
+        return weights
+
+    with open(path, encoding='utf-8') as weights_file:
+        loaded = json.load(weights_file)
+
+    for name, weight in loaded.items():
+        if name not in weights:
+            raise ValueError(f'Неизвестный признак оценки: {name}')
+        weights[name] = int(weight)
+    return weights
+
+
+def save_weights(path, weights: dict):
+    '''Сохранение весов признаков в JSON'''
+    with open(path, 'w', encoding='utf-8') as weights_file:
+        json.dump({name: weights[name] for name in FEATURE_NAMES}, weights_file, indent=4)
+        weights_file.write('\n')
+
+
+class Evaluator:
+    '''Оценка позиции - взвешенная сумма признаков'''
+
+    def __init__(self, weights: dict = None):
+        self.__weights = dict(DEFAULT_WEIGHTS if weights is None else weights)
+        self.__weights_list = [self.__weights[name] for name in FEATURE_NAMES]
+
+    @property
+    def weights(self) -> dict:
+        return dict(self.__weights)
+
+    def evaluate(self, field, side: SideType) -> int:
+        '''Оценка позиции с точки зрения стороны'''
+        score = sum(weight * value for weight, value in zip(self.__weights_list, extract_features(field)))
+        return score if side == SideType.WHITE else -score
+
+
+@lru_cache(maxsize=None)
+def get_evaluator(path) -> Evaluator:
+    '''Оценка с весами из файла (одна на процесс)'''
+    return Evaluator(load_weights(path))
@@ -0,0 +1,71 @@
+from pathlib import Path
+
+import numpy as np
+
+from checkers.batch import fields_to_array
+from checkers.records import iterate_positions
+
+
+# Исход партии для обучения: с точки зрения белых (неоконченная партия считается ничьей)
+RESULT_VALUES = {'white': 1, 'black': -1, 'draw': 0, None: 0}
+
+# Количество позиций в одном файле выгрузки
+EXPORT_SHARD_SIZE = 1 << 16
+
+
+def iterate_position_batches(records, batch_size: int = EXPORT_SHARD_SIZE):
+    '''Потоковая выгрузка позиций партий пачками (словарями массивов NumPy):
+    boards (N, Y, X) int8 - типы шашек (значения CheckerType),
+    sides (N,) int8 - сторона хода (значения SideType),
+    results (N,) int8 - исход партии с точки зрения белых,
+    from_squares, to_squares (N,) int16 - индексы клеток начала и конца сделанного хода.
+
+    В пачке позиции одного размера поля: при смене размера пачка выгружается досрочно
+    '''
+    boards = []
+    sides, results, from_squares, to_squares = [], [], [], []
+    size = None
+
+    def make_batch() -> dict:
+        return {
+            'boards': np.stack(boards),
+            'sides': np.array(sides, dtype=np.int8),
+            'results': np.array(results, dtype=np.int8),
+            'from_squares': np.array(from_squares, dtype=np.int16),
+            'to_squares': np.array(to_squares, dtype=np.int16),
+        }
+
+    for record in records:
+        if boards and size != (record.x_size, record.y_size):
+            yield make_batch()
+            boards, sides, results, from_squares, to_squares = [], [], [], [], []
+        size = (record.x_size, record.y_size)
+
+        for field, side, move in iterate_positions(record):
+            geometry = field.geometry
+            # Поле одно на всю партию, поэтому позиция сразу переводится в массив
+            boards.append(fields_to_array((field,))[0])
+            sides.append(side.value)
+            results.append(RESULT_VALUES[record.result])
+            from_squares.append(geometry.index(move.from_x, move.from_y))
+            to_squares.append(geometry.index(move.to_x, move.to_y))
+
+            if len(boards) >= batch_size:
+                yield make_batch()
+                boards, sides, results, from_squares, to_squares = [], [], [], [], []
+
+    if boards:
+        yield make_batch()
+
+
+def export_npz(records, directory, shard_size: int = EXPORT_SHARD_SIZE) -> int:
+    '''Выгрузка позиций партий в файлы positions-00000.npz каталога (не больше shard_size позиций
+    в файле); возвращает количество выгруженных позиций'''
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    positions_count = 0
+    for number, batch in enumerate(iterate_position_batches(records, shard_size)):
+        np.savez_compressed(directory / f'positions-{number:05}.npz', **batch)
+        positions_count += len(batch['sides'])
+    return positions_count
@@ -1,14 +1,32 @@
-from checkers.enums import CheckerType
-from checkers.checker import Checker
-from checkers.constants import WHITE_CHECKERS, BLACK_CHECKERS
+from checkers.enums import CheckerType, SideType
+from checkers.checker import FieldChecker
+from checkers.bitboard import get_geometry, iterate_bits, popcount, BoardGeometry
+from checkers.zobrist import get_zobrist_keys
+from checkers.rules import Rules, get_rules
+from checkers.constants import DEBUG_CHECKS
 
-from functools import reduce
+
+class MoveRecord:
+    '''Информация о совершённом ходе, достаточная для его отмены'''
+    __slots__ = ('move', 'checker_type', 'promoted', 'captured')
+
+    def __init__(self, move, checker_type: CheckerType, promoted: bool, captured: list):
+        self.move = move
+        # Тип шашки до хода
+        self.checker_type = checker_type
+        # Превратилась ли шашка в дамку
+        self.promoted = promoted
+        # Список съеденных шашек [(индекс клетки, тип шашки)]
+        self.captured = captured
 
 
 class Field:
-    def __init__(self, x_size: int, y_size: int):
+    def __init__(self, x_size: int, y_size: int, rules: Rules = None):
         self.__x_size = x_size
         self.__y_size = y_size
+        self.__rules = get_rules(x_size, y_size) if rules is None else rules
+        self.__geometry = get_geometry(x_size, y_size)
+        self.__init_zobrist_keys()
         self.__generate()
 
     @property
@@ -23,57 +41,307 @@ class Field:
     def size(self) -> int:
         return max(self.x_size, self.y_size)
 
+    @property
+    def rules(self) -> Rules:
+        return self.__rules
+
+    @property
+    def geometry(self) -> BoardGeometry:
+        return self.__geometry
+
+    @property
+    def hash(self) -> int:
+        '''Хеш позиции по Зобристу (без учёта очерёдности хода)'''
+        return self.__hash
+
+    def __init_zobrist_keys(self):
+        '''Получение ключей хеширования для размера поля'''
+        zobrist_keys = get_zobrist_keys(self.__geometry.squares_count)
+        self.__white_regular_keys = zobrist_keys.keys(CheckerType.WHITE_REGULAR)
+        self.__black_regular_keys = zobrist_keys.keys(CheckerType.BLACK_REGULAR)
+        self.__white_queen_keys = zobrist_keys.keys(CheckerType.WHITE_QUEEN)
+        self.__black_queen_keys = zobrist_keys.keys(CheckerType.BLACK_QUEEN)
+
     @classmethod
     def copy(cls, field_instance):
         '''Создаёт копию поля из образца'''
-        field_copy = cls(field_instance.x_size, field_instance.y_size)
+        field_copy = cls.__new__(cls)
+        field_copy.__x_size = field_instance.x_size
+        field_copy.__y_size = field_instance.y_size
+        field_copy.__rules = field_instance.rules
+        field_copy.__geometry = field_instance.geometry
+        field_copy.__init_zobrist_keys()
 
-        for y in range(field_instance.y_size):
-            for x in range(field_instance.x_size):
-                field_copy.at(x, y).change_type(field_instance.type_at(x, y))
+        field_copy.__white_regular = field_instance.white_regular_bits
+        field_copy.__black_regular = field_instance.black_regular_bits
+        field_copy.__white_queen = field_instance.white_queen_bits
+        field_copy.__black_queen = field_instance.black_queen_bits
+        field_copy.__hash = field_instance.hash
+
+        field_copy.__white_regular_count = field_instance.white_regular_count
+        field_copy.__black_regular_count = field_instance.black_regular_count
+        field_copy.__white_queen_count = field_instance.white_queen_count
+        field_copy.__black_queen_count = field_instance.black_queen_count
 
         return field_copy
 
+    def clear(self):
+        '''Удаление всех шашек с поля'''
+        self.__white_regular = 0
+        self.__black_regular = 0
+        self.__white_queen = 0
+        self.__black_queen = 0
+        self.__hash = 0
+
+        # Счётчики шашек (поддерживаются при каждом изменении поля)
+        self.__white_regular_count = 0
+        self.__black_regular_count = 0
+        self.__white_queen_count = 0
+        self.__black_queen_count = 0
+
     def __generate(self):
         '''Генерация поля с шашками'''
-        self.__checkers = [[Checker() for x in range(self.x_size)] for y in range(self.y_size)]
+        self.clear()
+
+        # Перебираются только тёмные клетки рядов с шашками
+        for row in range(self.__rules.initial_rows(self.y_size)):
+            for index in iterate_bits(self.__geometry.row_mask(row)):
+                self.__place(index, CheckerType.BLACK_REGULAR)
+            for index in iterate_bits(self.__geometry.row_mask(self.y_size - 1 - row)):
+                self.__place(index, CheckerType.WHITE_REGULAR)
+
+    @property
+    def white_regular_bits(self) -> int:
+        return self.__white_regular
+
+    @property
+    def black_regular_bits(self) -> int:
+        return self.__black_regular
+
+    @property
+    def white_queen_bits(self) -> int:
+        return self.__white_queen
+
+    @property
+    def black_queen_bits(self) -> int:
+        return self.__black_queen
+
+    @property
+    def white_bits(self) -> int:
+        '''Битовая маска белых шашек'''
+        return self.__white_regular | self.__white_queen
+
+    @property
+    def black_bits(self) -> int:
+        '''Битовая маска чёрных шашек'''
+        return self.__black_regular | self.__black_queen
+
+    def side_bits(self, side: SideType) -> int:
+        '''Битовая маска шашек стороны'''
+        return self.white_bits if side == SideType.WHITE else self.black_bits
+
+    def pieces(self, side: SideType):
+        '''Перебор шашек стороны (x, y, тип шашки) - только занятых клеток, без просмотра всего поля'''
+        if side == SideType.WHITE:
+            groups = ((self.__white_regular, CheckerType.WHITE_REGULAR), (self.__white_queen, CheckerType.WHITE_QUEEN))
+        else:
+            groups = ((self.__black_regular, CheckerType.BLACK_REGULAR), (self.__black_queen, CheckerType.BLACK_QUEEN))
+
+        points = self.__geometry.points
+        for bits, checker_type in groups:
+            for index in iterate_bits(bits):
+                x, y = points[index]
+                yield x, y, checker_type
 
-        for y in range(self.y_size):
-            for x in range(self.x_size):
-                if ((y + x) % 2):
-                    if (y < 3):
-                        self.__checkers[y][x].change_type(CheckerType.BLACK_REGULAR)
-                    elif (y >= self.y_size - 3):
-                        self.__checkers[y][x].change_type(CheckerType.WHITE_REGULAR)
+    @property
+    def empty_bits(self) -> int:
+        '''Битовая маска пустых тёмных клеток'''
+        return self.__geometry.full_mask & ~(self.__white_regular | self.__white_queen |
+                                             self.__black_regular | self.__black_queen)
 
     def type_at(self, x: int, y: int) -> CheckerType:
         '''Получение типа шашки на поле по координатам'''
-        return self.__checkers[y][x].type
+        index = self.__geometry.index(x, y)
+        if index < 0:
+            return CheckerType.NONE
+
+        bit = 1 << index
+        if self.__white_regular & bit:
+            return CheckerType.WHITE_REGULAR
+        if self.__black_regular & bit:
+            return CheckerType.BLACK_REGULAR
+        if self.__white_queen & bit:
+            return CheckerType.WHITE_QUEEN
+        if self.__black_queen & bit:
+            return CheckerType.BLACK_QUEEN
+        return CheckerType.NONE
+
+    def set_type_at(self, x: int, y: int, type: CheckerType):
+        '''Изменение типа шашки на поле по координатам'''
+        index = self.__geometry.index(x, y)
+        if index < 0:
+            if type == CheckerType.NONE:
+                return
+            raise ValueError(f'Шашка не может стоять на светлой клетке {x}-{y}')
+
+        self.__remove(index)
+        self.__place(index, type)
+
+    def __remove(self, index: int) -> CheckerType:
+        '''Удаление шашки с клетки (по индексу) с возвратом её типа'''
+        bit = 1 << index
+        if self.__white_regular & bit:
+            self.__white_regular ^= bit
+            self.__white_regular_count -= 1
+            self.__hash ^= self.__white_regular_keys[index]
+            return CheckerType.WHITE_REGULAR
+        if self.__black_regular & bit:
+            self.__black_regular ^= bit
+            self.__black_regular_count -= 1
+            self.__hash ^= self.__black_regular_keys[index]
+            return CheckerType.BLACK_REGULAR
+        if self.__white_queen & bit:
+            self.__white_queen ^= bit
+            self.__white_queen_count -= 1
+            self.__hash ^= self.__white_queen_keys[index]
+            return CheckerType.WHITE_QUEEN
+        if self.__black_queen & bit:
+            self.__black_queen ^= bit
+            self.__black_queen_count -= 1
+            self.__hash ^= self.__black_queen_keys[index]
+            return CheckerType.BLACK_QUEEN
+        return CheckerType.NONE
+
+    def __place(self, index: int, type: CheckerType):
+        '''Установка шашки на пустую клетку (по индексу)'''
+        bit = 1 << index
+        if type == CheckerType.WHITE_REGULAR:
+            self.__white_regular |= bit
+            self.__white_regular_count += 1
+            self.__hash ^= self.__white_regular_keys[index]
+        elif type == CheckerType.BLACK_REGULAR:
+            self.__black_regular |= bit
+            self.__black_regular_count += 1
+            self.__hash ^= self.__black_regular_keys[index]
+        elif type == CheckerType.WHITE_QUEEN:
+            self.__white_queen |= bit
+            self.__white_queen_count += 1
+            self.__hash ^= self.__white_queen_keys[index]
+        elif type == CheckerType.BLACK_QUEEN:
+            self.__black_queen |= bit
+            self.__black_queen_count += 1
+            self.__hash ^= self.__black_queen_keys[index]
+
+    def make_move(self, move, promote: bool = True) -> MoveRecord:
+        '''Совершение хода (в том числе со взятием нескольких шашек) на месте, без копирования поля
+
+        promote=False - ход является прыжком из середины цепочки взятия, шашка не превращается в дамку
+        '''
+        geometry = self.__geometry
+        from_index = geometry.index(move.from_x, move.from_y)
+        to_index = geometry.index(move.to_x, move.to_y)
+
+        # Изменение позиции шашки
+        checker_type = self.__remove(from_index)
+        promoted = False
+
+        # Удаление съеденных шашек (до установки шашки: дамка может закончить взятие
+        # на клетке шашки, съеденной раньше в этой же цепочке)
+        captured = []
+        for x, y in move.captured:
+            index = geometry.index(x, y)
+            captured.append((index, self.__remove(index)))
+
+        # Изменение типа шашки, если она дошла до края (посреди взятия - если это допускают правила)
+        if promote and (checker_type == CheckerType.WHITE_REGULAR or checker_type == CheckerType.BLACK_REGULAR):
+            landings_bits = 1 << to_index
+            if self.__rules.promote_during_capture:
+                for x, y in move.path:
+                    landings_bits |= 1 << geometry.index(x, y)
+
+            if checker_type == CheckerType.WHITE_REGULAR and landings_bits & geometry.first_row_mask:
+                self.__place(to_index, CheckerType.WHITE_QUEEN)
+                promoted = True
+            elif checker_type == CheckerType.BLACK_REGULAR and landings_bits & geometry.last_row_mask:
+                self.__place(to_index, CheckerType.BLACK_QUEEN)
+                promoted = True
+
+        if not promoted:
+            self.__place(to_index, checker_type)
+
+        if DEBUG_CHECKS:
+            self.check_counters()
 
-    def at(self, x: int, y: int) -> Checker:
+        return MoveRecord(move, checker_type, promoted, captured)
+
+    def unmake_move(self, record: MoveRecord):
+        '''Отмена хода, совершённого make_move'''
+        geometry = self.__geometry
+        self.__remove(geometry.index(record.move.to_x, record.move.to_y))
+        self.__place(geometry.index(record.move.from_x, record.move.from_y), record.checker_type)
+
+        for index, captured_type in record.captured:
+            self.__place(index, captured_type)
+
+        if DEBUG_CHECKS:
+            self.check_counters()
+
+    def at(self, x: int, y: int) -> FieldChecker:
         '''Получение шашки на поле по координатам'''
-        return self.__checkers[y][x]
+        return FieldChecker(self, x, y)
 
     def is_within(self, x: int, y: int) -> bool:
         '''Определяет лежит ли точка в пределах поля'''
         return 0 <= x < self.x_size and 0 <= y < self.y_size
 
+    @property
+    def white_regular_count(self) -> int:
+        return self.__white_regular_count
+
+    @property
+    def black_regular_count(self) -> int:
+        return self.__black_regular_count
+
+    @property
+    def white_queen_count(self) -> int:
+        return self.__white_queen_count
+
+    @property
+    def black_queen_count(self) -> int:
+        return self.__black_queen_count
+
     @property
     def white_checkers_count(self) -> int:
         '''Количество белых шашек на поле'''
-        return sum(reduce(lambda acc, checker: acc + (checker.type in WHITE_CHECKERS), checkers, 0) for checkers in self.__checkers)
+        return self.__white_regular_count + self.__white_queen_count
 
     @property
     def black_checkers_count(self) -> int:
         '''Количество чёрных шашек на поле'''
-        return sum(reduce(lambda acc, checker: acc + (checker.type in BLACK_CHECKERS), checkers, 0) for checkers in self.__checkers)
+        return self.__black_regular_count + self.__black_queen_count
+
+    def checkers_count(self, side: SideType) -> int:
+        '''Количество шашек стороны на поле'''
+        return self.white_checkers_count if side == SideType.WHITE else self.black_checkers_count
 
     @property
     def white_score(self) -> int:
         '''Счёт белых'''
-        return sum(reduce(lambda acc, checker: acc + (checker.type == CheckerType.WHITE_REGULAR) + (checker.type == CheckerType.WHITE_QUEEN) * 3, checkers, 0) for checkers in self.__checkers)
+        return self.__white_regular_count + self.__white_queen_count * 3
 
     @property
     def black_score(self) -> int:
         '''Счёт чёрных'''
-        return sum(reduce(lambda acc, checker: acc + (checker.type == CheckerType.BLACK_REGULAR) + (checker.type == CheckerType.BLACK_QUEEN) * 3, checkers, 0) for checkers in self.__checkers)
+        return self.__black_regular_count + self.__black_queen_count * 3
+
+    def check_counters(self):
+        '''Проверка счётчиков шашек полным пересчётом (для отладки)'''
+        counters = (
+            (self.__white_regular_count, self.__white_regular),
+            (self.__black_regular_count, self.__black_regular),
+            (self.__white_queen_count, self.__white_queen),
+            (self.__black_queen_count, self.__black_queen),
+        )
+        for count, bits in counters:
+            if count != popcount(bits):
+                raise AssertionError(f'Счётчик шашек {count} не совпадает с полем ({popcount(bits)})')
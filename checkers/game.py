@@ -1,125 +1,159 @@
-from random import choice
-from math import inf
+from multiprocessing import current_process
 
 from checkers.field import Field
-from checkers.move import Move
+from checkers.rules import Rules, get_rules
+from checkers.bitboard import iterate_bits
+from checkers.move import Move, MoveSet, join_steps
+from checkers.search import Search
+from checkers.stats import SearchStats
+from checkers.transposition import TranspositionTable
+from checkers.book import get_opening_book
+from checkers.tablebase import get_tablebase
+from checkers.evaluation import get_evaluator
+from checkers.zobrist import position_key
+from checkers.parallel import ParallelSearch, get_search_pool
 from checkers.constants import *
-from checkers.enums import CheckerType, SideType
+from checkers.enums import SideType
 
 
 class Game:
-    def __init__(self, x_field_size: int, y_field_size: int):
-        self.field = Field(x_field_size, y_field_size)
+    def __init__(self, x_field_size: int, y_field_size: int, rules: Rules = None):
+        self.field = Field(x_field_size, y_field_size, rules)
 
         self.player_turn = True
 
-    def __handle_move(self, move: Move, draw: bool = True) -> bool:
-        '''Совершение хода'''
-
-        # Изменение типа шашки, если она дошла до края
-        if move.to_y == 0 and self.field.type_at(move.from_x, move.from_y) == CheckerType.WHITE_REGULAR:
-            self.field.at(move.from_x, move.from_y).change_type(CheckerType.WHITE_QUEEN)
-        elif (move.to_y == self.field.y_size - 1 and self.field.type_at(move.from_x,
-                                                                        move.from_y) == CheckerType.BLACK_REGULAR):
-            self.field.at(move.from_x, move.from_y).change_type(CheckerType.BLACK_QUEEN)
-
-        # Изменение позиции шашки
-        self.field.at(move.to_x, move.to_y).change_type(self.field.type_at(move.from_x, move.from_y))
-        self.field.at(move.from_x, move.from_y).change_type(CheckerType.NONE)
-
-        # Вектора движения
-        dx = -1 if move.from_x < move.to_x else 1
-        dy = -1 if move.from_y < move.to_y else 1
-
-        # Удаление съеденных шашек
-        has_killed_checker = False
-        x, y = move.to_x, move.to_y
-        while x != move.from_x or y != move.from_y:
-            x += dx
-            y += dy
-            if self.field.type_at(x, y) != CheckerType.NONE:
-                self.field.at(x, y).change_type(CheckerType.NONE)
-                has_killed_checker = True
-
-        return has_killed_checker
-
-    def predict_optimal_moves(self, side):
-        '''Предсказать оптимальный ход'''
-        best_result = 0
-        optimal_moves = []
-        predicted_moves_list = self.get_predicted_moves_list(side)
-
-        if predicted_moves_list:
-            field_copy = Field.copy(self.field)
-            for moves in predicted_moves_list:
-                for move in moves:
-                    self.__handle_move(move, draw=False)
-
-                try:
-                    if side == SideType.WHITE:
-                        result = self.field.white_score / self.field.black_score
-                    elif side == SideType.BLACK:
-                        result = self.field.black_score / self.field.white_score
-                except ZeroDivisionError:
-                    result = inf
-
-                if result > best_result:
-                    best_result = result
-                    optimal_moves.clear()
-                    optimal_moves.append(moves)
-                elif result == best_result:
-                    optimal_moves.append(moves)
-
-                self.field = Field.copy(field_copy)
-
-        optimal_move = []
-        if optimal_moves:
-            # Фильтрация хода
-            for move in choice(optimal_moves):
-                if side == SideType.WHITE and self.field.type_at(move.from_x, move.from_y) in BLACK_CHECKERS:
-                    break
-                elif side == SideType.BLACK and self.field.type_at(move.from_x, move.from_y) in WHITE_CHECKERS:
-                    break
-
-                optimal_move.append(move)
-
-        return optimal_move
-
-    def get_predicted_moves_list(self, side, current_prediction_depth: int = 0,
-                                 all_moves_list=[], current_moves_list=[],
-                                 required_moves_list=[]):
-        '''Предсказать все возможные ходы'''
-
-        if current_moves_list:
-            all_moves_list.append(current_moves_list)
-        else:
-            all_moves_list.clear()
-
-        if required_moves_list:
-            moves_list = required_moves_list
-        else:
-            moves_list = self.get_moves_list(side)
-
-        if moves_list and current_prediction_depth < MAX_PREDICTION_DEPTH:
-            field_copy = Field.copy(self.field)
-            for move in moves_list:
-                has_killed_checker = self.__handle_move(move, draw=False)
-
-                required_moves_list = list(filter(
-                    lambda required_move: move.to_x == required_move.from_x and move.to_y == required_move.from_y,
-                    self.get_required_moves_list(side)))
-
-                # Если есть ещё ход этой же шашкой
-                if has_killed_checker and required_moves_list:
-                    self.get_predicted_moves_list(side, current_prediction_depth, all_moves_list,
-                                                  current_moves_list + [move], required_moves_list)
-                else:
-                    self.get_predicted_moves_list(SideType.opposite(side), current_prediction_depth + 1,
-                                                  all_moves_list, current_moves_list + [move])
-
-                self.field = Field.copy(field_copy)
-
-        return all_moves_list
+        # Стек отмены ходов
+        self.__undo_stack = []
+
+        # Таблица транспозиций (создаётся при первом поиске)
+        self.__transposition_table = None
+
+        # Последние наборы допустимых ходов сторон: {сторона: (ключ позиции, ходы)}
+        self.__legal_moves = {}
+
+    @property
+    def rules(self) -> Rules:
+        return self.field.rules
+
+    @property
+    def transposition_table(self) -> TranspositionTable:
+        if self.__transposition_table is None:
+            self.__transposition_table = TranspositionTable(TRANSPOSITION_TABLE_SIZE)
+        return self.__transposition_table
+
+    @transposition_table.setter
+    def transposition_table(self, transposition_table: TranspositionTable):
+        self.__transposition_table = transposition_table
+
+    def make_move(self, move: Move, promote: bool = True) -> bool:
+        '''Совершение хода с сохранением информации для его отмены (promote - как в Field.make_move)'''
+        record = self.field.make_move(move, promote)
+        self.__undo_stack.append(record)
+
+        # Была ли убита шашка
+        return bool(record.captured)
+
+    def unmake_move(self):
+        '''Отмена последнего совершённого хода'''
+        self.field.unmake_move(self.__undo_stack.pop())
+
+    @property
+    def history(self) -> list:
+        '''Ходы партии от начальной позиции (прыжки одной цепочки взятия объединены в один ход)'''
+        return join_steps(record.move for record in self.__undo_stack)
+
+    def copy(self) -> 'Game':
+        '''Копия игры с копией поля (таблица транспозиций общая), например для поиска в другом потоке'''
+        game_copy = Game.__new__(Game)
+        game_copy.field = Field.copy(self.field)
+        game_copy.player_turn = self.player_turn
+        game_copy.__undo_stack = []
+        game_copy.__transposition_table = self.transposition_table
+        game_copy.__legal_moves = dict(self.__legal_moves)
+        return game_copy
+
+    def has_default_rules(self) -> bool:
+        '''Совпадают ли правила с правилами по умолчанию для размера поля
+        (по ним строятся книга дебютов и база эндшпиля)'''
+        return self.rules == get_rules(self.field.x_size, self.field.y_size)
+
+    def find_book_move(self, side) -> Move:
+        '''Ход из книги дебютов (None, если книги нет или позиции нет в книге)'''
+        # Книга составлена по правилам по умолчанию для размера поля
+        if not USE_OPENING_BOOK or not self.has_default_rules():
+            return None
+
+        opening_book = get_opening_book(OPENING_BOOK_PATH)
+        if opening_book is None:
+            return None
+        return opening_book.find_move(self, side)
+
+    def create_search(self, workers: int = None, stop_event=None, stats: SearchStats = None):
+        '''Поиск по этой игре с общей таблицей транспозиций, базой эндшпиля и оценкой из файла.
+
+        При workers > 1 ходы корня делятся между процессами (ParallelSearch); в процессах,
+        которые сами не могут создавать процессы (например, в пуле selfplay.py), поиск однопоточный.
+        stats - статистика, заполняемая при каждом поиске (см. SearchStats)
+        '''
+        if workers is None:
+            workers = SEARCH_WORKERS
+        parallel = workers > 1 and not current_process().daemon
+        # Ходы, оцениваемые в этом процессе, останавливаются тем же флагом, что и процессы пула
+        if parallel:
+            stop_event = get_search_pool(workers)[1]
+
+        tablebase = None
+        if USE_TABLEBASE and self.has_default_rules():
+            tablebase = get_tablebase(TABLEBASE_PATH, self.field.x_size, self.field.y_size, TABLEBASE_MAX_PIECES)
+        search = Search(self, self.transposition_table, tablebase, get_evaluator(EVALUATION_WEIGHTS_PATH), stop_event,
+                        stats)
+
+        if parallel:
+            return ParallelSearch(self, search, workers)
+        return search
+
+    def predict_optimal_moves(self, side, time_limit: float = None, max_depth: int = None, search: Search = None):
+        '''Предсказать оптимальный ход (на фиксированную глубину или за отведённое время в секундах)
+        Возвращает ход целиком (со всей цепочкой взятия) или None, если ходов нет.
+        search - заранее созданный поиск (create_search), чтобы его можно было остановить'''
+        # Ход из книги дебютов не требует поиска
+        book_move = self.find_book_move(side)
+        if book_move is not None:
+            if search is not None and search.stats is not None:
+                search.stats.reset()
+                search.stats.book_move = True
+                search.stats.finish()
+            return book_move
+
+        if max_depth is None:
+            max_depth = MAX_PREDICTION_DEPTH if time_limit is None else MAX_SEARCH_DEPTH
+        if search is None:
+            search = self.create_search()
+        return search.search(side, max_depth, time_limit)
+
+    def find_move(self, side, stops: list) -> Move:
+        '''Поиск хода по клеткам остановки [(x, y), ...] (см. Move.stops). Для сокращённой записи
+        взятия достаточно начальной и конечной клеток, если такой ход единственный.
+        None, если хода нет'''
+        stops = [tuple(stop) for stop in stops]
+        candidates = []
+        for move in self.get_legal_moves(side):
+            move_stops = move.stops
+            if move_stops == stops:
+                return move
+            if move_stops[0] == stops[0] and move_stops[-1] == stops[-1]:
+                candidates.append(move)
+        return candidates[0] if len(candidates) == 1 else None
+
+    def get_legal_moves(self, side) -> MoveSet:
+        '''Допустимые ходы стороны с индексом по клеткам (запоминаются для позиции:
+        любое изменение поля меняет ключ позиции, и набор строится заново)'''
+        key = position_key(self.field, side)
+        cached = self.__legal_moves.get(side)
+        if cached is None or cached[0] != key:
+            cached = (key, MoveSet(self.get_moves_list(side)))
+            self.__legal_moves[side] = cached
+        return cached[1]
 
     def get_moves_list(self, side):
         '''Получение списка ходов'''
@@ -129,95 +163,196 @@ class Game:
         return moves_list
 
     def get_required_moves_list(self, side):
-        '''Получение списка обязательных ходов'''
+        '''Получение списка обязательных ходов (полных цепочек взятия)'''
         moves_list = []
 
-        # Определение типов шашек
+        # Определение битовых масок шашек и направлений хода обычной шашки вперёд
         if side == SideType.WHITE:
-            friendly_checkers = WHITE_CHECKERS
-            enemy_checkers = BLACK_CHECKERS
+            regular_bits = self.field.white_regular_bits
+            queen_bits = self.field.white_queen_bits
+            enemy_bits = self.field.black_bits
+            forward_directions = (0, 1)
         elif side == SideType.BLACK:
-            friendly_checkers = BLACK_CHECKERS
-            enemy_checkers = WHITE_CHECKERS
+            regular_bits = self.field.black_regular_bits
+            queen_bits = self.field.black_queen_bits
+            enemy_bits = self.field.white_bits
+            forward_directions = (2, 3)
         else:
             return moves_list
 
-        for y in range(self.field.y_size):
-            for x in range(self.field.x_size):
-
-                # Для обычной шашки
-                if self.field.type_at(x, y) == friendly_checkers[0]:
-                    for offset in MOVE_OFFSETS:
-                        if not (self.field.is_within(x + offset.x * 2, y + offset.y * 2)): continue
-
-                        if self.field.type_at(x + offset.x, y + offset.y) in enemy_checkers and self.field.type_at(
-                                x + offset.x * 2, y + offset.y * 2) == CheckerType.NONE:
-                            moves_list.append(Move(x, y, x + offset.x * 2, y + offset.y * 2))
-
-                # Для дамки
-                elif self.field.type_at(x, y) == friendly_checkers[1]:
-                    for offset in MOVE_OFFSETS:
-                        if not (self.field.is_within(x + offset.x * 2, y + offset.y * 2)): continue
-
-                        has_enemy_checker_on_way = False
-
-                        for shift in range(1, self.field.size):
-                            if not (self.field.is_within(x + offset.x * shift, y + offset.y * shift)): continue
-
-                            # Если на пути не было вражеской шашки
-                            if not has_enemy_checker_on_way:
-                                if self.field.type_at(x + offset.x * shift, y + offset.y * shift) in enemy_checkers:
-                                    has_enemy_checker_on_way = True
-                                    continue
-                                # Если на пути союзная шашка - то закончить цикл
-                                elif (self.field.type_at(x + offset.x * shift,
-                                                         y + offset.y * shift) in friendly_checkers):
-                                    break
-
-                            # Если на пути была вражеская шашка
-                            if has_enemy_checker_on_way:
-                                if (self.field.type_at(x + offset.x * shift,
-                                                       y + offset.y * shift) == CheckerType.NONE):
-                                    moves_list.append(Move(x, y, x + offset.x * shift, y + offset.y * shift))
-                                else:
-                                    break
+        rules = self.field.rules
+        geometry = self.field.geometry
+        empty_bits = self.field.empty_bits
+
+        # Направления взятия обычной шашки
+        regular_directions = tuple(range(len(MOVE_OFFSETS))) if rules.men_capture_backwards else forward_directions
+
+        # Обычные шашки, которые могут бить в каждом из направлений
+        # (противоположное направление для MOVE_OFFSETS[direction] - MOVE_OFFSETS[3 - direction])
+        movable_bits = queen_bits
+        for direction in regular_directions:
+            movable_bits |= geometry.shift(geometry.shift(empty_bits, 3 - direction) & enemy_bits,
+                                           3 - direction) & regular_bits
+
+        # Клетки превращения обычной шашки в дамку (посреди взятия - только если это допускают правила)
+        promotion_mask = 0
+        if rules.promote_during_capture:
+            promotion_mask = geometry.first_row_mask if side == SideType.WHITE else geometry.last_row_mask
+
+        for index in iterate_bits(movable_bits):
+            self.__collect_captures(index, index, bool(queen_bits & (1 << index)), promotion_mask,
+                                    regular_directions, enemy_bits, empty_bits, [], [], moves_list)
+
+        # Правило большинства: обязательно взятие наибольшего количества шашек
+        if rules.max_capture and moves_list:
+            max_captured = max(len(move.captured) for move in moves_list)
+            moves_list = [move for move in moves_list if len(move.captured) == max_captured]
 
         return moves_list
 
+    def __collect_captures(self, from_index: int, index: int, is_queen: bool, promotion_mask: int,
+                           regular_directions: tuple, enemy_bits: int, empty_bits: int, path: list, captured: list,
+                           moves_list: list) -> bool:
+        '''Поиск в глубину всех цепочек взятия шашкой, стоящей на клетке index.
+        Съеденные шашки исключаются из вражеских, поэтому не могут быть съедены повторно,
+        а до окончания хода (если этого требуют правила) остаются на поле препятствием.
+        Возвращает, можно ли продолжить взятие с этой клетки'''
+        geometry = self.field.geometry
+        rules = self.field.rules
+        bit = 1 << index
+        has_capture = False
+        # Клетка съеденной шашки освобождается сразу, только если правила снимают её до окончания хода
+        released_mask = 0 if rules.remove_captured_after_move else -1
+
+        # Для дальнобойной дамки
+        if is_queen and rules.flying_kings:
+            for ray, ray_bits in zip(geometry.rays[index], geometry.ray_bits[index]):
+                victim_index = -1
+                # Пустые клетки за вражеской шашкой, на которые можно встать после её взятия
+                landings = []
+
+                for ray_index, ray_bit in zip(ray, ray_bits):
+                    # Если на пути не было вражеской шашки
+                    if victim_index < 0:
+                        if ray_bit & enemy_bits:
+                            victim_index, victim_bit = ray_index, ray_bit
+                        # Если на пути союзная шашка - то закончить цикл
+                        elif not (ray_bit & empty_bits):
+                            break
+
+                    # Если на пути была вражеская шашка
+                    elif ray_bit & empty_bits:
+                        landings.append((ray_index, ray_bit))
+                    else:
+                        break
+
+                if not landings:
+                    continue
+
+                # Если с какой-либо из клеток взятие продолжается, дамка обязана встать на такую клетку
+                has_capture = True
+                continued_moves, finished_moves = [], []
+                for ray_index, ray_bit in landings:
+                    landing_moves = []
+                    if self.__collect_captures(from_index, ray_index, True, promotion_mask, regular_directions,
+                                               enemy_bits ^ victim_bit,
+                                               (empty_bits | bit | victim_bit & released_mask) ^ ray_bit,
+                                               path + [ray_index], captured + [victim_index], landing_moves):
+                        continued_moves.extend(landing_moves)
+                    else:
+                        finished_moves.extend(landing_moves)
+                moves_list.extend(continued_moves or finished_moves)
+
+        # Для обычной шашки (и дамки, которая бьёт только через соседнюю клетку)
+        else:
+            neighbours, jumps = geometry.neighbours[index], geometry.jumps[index]
+            for direction in (range(len(MOVE_OFFSETS)) if is_queen else regular_directions):
+                jump_index = jumps[direction]
+                if jump_index < 0:
+                    continue
+
+                victim_bit, jump_bit = 1 << neighbours[direction], 1 << jump_index
+                if victim_bit & enemy_bits and jump_bit & empty_bits:
+                    has_capture = True
+                    self.__collect_captures(from_index, jump_index, is_queen or bool(jump_bit & promotion_mask),
+                                            promotion_mask, regular_directions,
+                                            enemy_bits ^ victim_bit,
+                                            (empty_bits | bit | victim_bit & released_mask) ^ jump_bit,
+                                            path + [jump_index], captured + [neighbours[direction]], moves_list)
+
+        # Взятие закончено, если продолжить его нельзя
+        if not has_capture and path:
+            points = geometry.points
+            from_x, from_y = points[from_index]
+            to_x, to_y = points[path[-1]]
+            moves_list.append(Move(from_x, from_y, to_x, to_y,
+                                   tuple(points[path_index] for path_index in path[:-1]),
+                                   tuple(points[captured_index] for captured_index in captured)))
+
+        return has_capture
+
     def get_optional_moves_list(self, side):
         '''Получение списка необязательных ходов'''
         moves_list = []
 
-        # Определение типов шашек
+        # Определение битовых масок шашек и направлений хода обычной шашки
         if side == SideType.WHITE:
-            friendly_checkers = WHITE_CHECKERS
+            regular_bits = self.field.white_regular_bits
+            queen_bits = self.field.white_queen_bits
+            regular_directions = (0, 1)
         elif side == SideType.BLACK:
-            friendly_checkers = BLACK_CHECKERS
+            regular_bits = self.field.black_regular_bits
+            queen_bits = self.field.black_queen_bits
+            regular_directions = (2, 3)
         else:
             return moves_list
 
-        for y in range(self.field.y_size):
-            for x in range(self.field.x_size):
-                # Для обычной шашки
-                if self.field.type_at(x, y) == friendly_checkers[0]:
-                    for offset in MOVE_OFFSETS[:2] if side == SideType.WHITE else MOVE_OFFSETS[2:]:
-                        if not (self.field.is_within(x + offset.x, y + offset.y)): continue
-
-                        if self.field.type_at(x + offset.x, y + offset.y) == CheckerType.NONE:
-                            moves_list.append(Move(x, y, x + offset.x, y + offset.y))
-
-                # Для дамки
-                elif self.field.type_at(x, y) == friendly_checkers[1]:
-                    for offset in MOVE_OFFSETS:
-                        if not self.field.is_within(x + offset.x, y + offset.y):
-                            continue
-
-                        for shift in range(1, self.field.size):
-                            if not (self.field.is_within(x + offset.x * shift, y + offset.y * shift)):
-                                continue
-
-                            if self.field.type_at(x + offset.x * shift, y + offset.y * shift) == CheckerType.NONE:
-                                moves_list.append(Move(x, y, x + offset.x * shift, y + offset.y * shift))
-                            else:
-                                break
+        geometry = self.field.geometry
+        empty_bits = self.field.empty_bits
+        flying_kings = self.field.rules.flying_kings
+
+        points = geometry.points
+        for index in iterate_bits(regular_bits | queen_bits):
+            x, y = points[index]
+            bit = 1 << index
+
+            # Для обычной шашки
+            if regular_bits & bit:
+                neighbours = geometry.neighbours[index]
+                for direction in regular_directions:
+                    to_index = neighbours[direction]
+                    if to_index >= 0 and (1 << to_index) & empty_bits:
+                        to_x, to_y = points[to_index]
+                        moves_list.append(Move(x, y, to_x, to_y))
+
+            # Для дамки
+            else:
+                for ray, ray_bits in zip(geometry.rays[index], geometry.ray_bits[index]):
+                    for ray_index, ray_bit in zip(ray, ray_bits):
+                        if not (ray_bit & empty_bits):
+                            break
+                        to_x, to_y = points[ray_index]
+                        moves_list.append(Move(x, y, to_x, to_y))
+                        # Недальнобойная дамка ходит только на соседнюю клетку
+                        if not flying_kings:
+                            break
+
         return moves_list
+
+    def has_optional_moves(self, side) -> bool:
+        '''Есть ли у стороны необязательные ходы (без их генерации: достаточно пустой соседней клетки)'''
+        if side == SideType.WHITE:
+            regular_bits, queen_bits = self.field.white_regular_bits, self.field.white_queen_bits
+            regular_directions = (0, 1)
+        else:
+            regular_bits, queen_bits = self.field.black_regular_bits, self.field.black_queen_bits
+            regular_directions = (2, 3)
+
+        geometry = self.field.geometry
+        empty_bits = self.field.empty_bits
+        for direction in range(len(MOVE_OFFSETS)):
+            # Шашки, соседняя клетка которых в этом направлении пуста
+            movable_bits = queen_bits | (regular_bits if direction in regular_directions else 0)
+            if geometry.shift(empty_bits, 3 - direction) & movable_bits:
+                return True
+        return False
@@ -0,0 +1,69 @@
+from random import Random
+from time import perf_counter
+
+from checkers.game import Game
+from checkers.move import Move
+from checkers.stats import SearchStats
+from checkers.constants import X_SIZE, Y_SIZE, MAX_GAME_TURNS, RANDOM_OPENING_TURNS
+from checkers.enums import SideType
+
+
+def move_to_list(move: Move) -> list:
+    '''Представление хода для JSON по клеткам остановки: [[x, y], ...] (см. Game.find_move)'''
+    return [[x, y] for x, y in move.stops]
+
+
+def play_game(seed: int = 0, max_depth: int = None, time_limit: float = None,
+              opening_turns: int = RANDOM_OPENING_TURNS, max_turns: int = MAX_GAME_TURNS,
+              x_size: int = X_SIZE, y_size: int = Y_SIZE, collect_stats: bool = False) -> dict:
+    '''Партия компьютера против компьютера без графического интерфейса.
+
+    Первые opening_turns ходов выбираются случайно (по seed), чтобы партии различались.
+    Возвращает словарь с победителем ('white', 'black' или 'draw'), количеством ходов,
+    самими ходами и временем обдумывания каждого хода (в секундах).
+    При collect_stats добавляется статистика поиска каждого хода (None для случайных ходов).
+    '''
+    random = Random(seed)
+    game = Game(x_size, y_size)
+    side = SideType.WHITE
+    stats = SearchStats() if collect_stats else None
+    search = game.create_search(stats=stats)
+
+    turns = []
+    move_times = []
+    moves_stats = []
+    winner = 'draw'
+
+    while len(turns) < max_turns:
+        start_time = perf_counter()
+        if len(turns) < opening_turns:
+            moves_list = game.get_legal_moves(side)
+            move = random.choice(moves_list) if moves_list else None
+            move_stats = None
+        else:
+            move = game.predict_optimal_moves(side, time_limit, max_depth, search)
+            move_stats = None if stats is None else stats.to_dict()
+        move_time = perf_counter() - start_time
+
+        # Нет ходов - поражение
+        if move is None:
+            winner = SideType.opposite(side).name.lower()
+            break
+
+        game.make_move(move)
+
+        turns.append(move_to_list(move))
+        move_times.append(round(move_time, 6))
+        moves_stats.append(move_stats)
+        side = SideType.opposite(side)
+
+    result = {
+        'seed': seed,
+        'winner': winner,
+        'turns_count': len(turns),
+        'turns': turns,
+        'move_times': move_times,
+    }
+    if collect_stats:
+        result['stats'] = moves_stats
+    return result
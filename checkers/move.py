@@ -1,39 +1,108 @@
-class Move:
-    def __init__(self, from_x: int = -1, from_y: int = -1, to_x: int = -1, to_y: int = -1):
-        self.__from_x = from_x
-        self.__from_y = from_y
-        self.__to_x = to_x
-        self.__to_y = to_y
+from typing import NamedTuple
 
-    @property
-    def from_x(self):
-        return self.__from_x
 
-    @property
-    def from_y(self):
-        return self.__from_y
+class Move(NamedTuple):
+    '''Ход (неизменяемый и хешируемый, может служить ключом словаря)'''
+    from_x: int = -1
+    from_y: int = -1
+    to_x: int = -1
+    to_y: int = -1
+    # Промежуточные клетки остановки при взятии нескольких шашек ((x, y), ...)
+    path: tuple = ()
+    # Клетки съеденных шашек в порядке взятия ((x, y), ...)
+    captured: tuple = ()
 
     @property
-    def to_x(self):
-        return self.__to_x
+    def steps(self) -> list:
+        '''Разбиение хода на отдельные прыжки (каждый со своей съеденной шашкой)'''
+        if not self.path:
+            return [self]
+
+        steps = []
+        x, y = self.from_x, self.from_y
+        for index, (to_x, to_y) in enumerate(self.path + ((self.to_x, self.to_y),)):
+            steps.append(Move(x, y, to_x, to_y, (), self.captured[index:index + 1]))
+            x, y = to_x, to_y
+        return steps
 
     @property
-    def to_y(self):
-        return self.__to_y
+    def stops(self) -> list:
+        '''Клетки остановки хода: начальная, промежуточные и конечная [(x, y), ...]'''
+        return [(self.from_x, self.from_y)] + list(self.path) + [(self.to_x, self.to_y)]
 
     def __str__(self):
-        return f'{self.from_x}-{self.from_y} -> {self.to_x}-{self.to_y}'
+        return ', '.join(f'{step.from_x}-{step.from_y} -> {step.to_x}-{step.to_y}' for step in self.steps)
 
     def __repr__(self):
-        return f'{self.from_x}-{self.from_y} -> {self.to_x}-{self.to_y}'
-
-    def __eq__(self, other):
-        if isinstance(other, Move):
-            return (
-                self.from_x == other.from_x and
-                self.from_y == other.from_y and
-                self.to_x == other.to_x and
-                self.to_y == other.to_y
-            )
-
-        return NotImplemented
+        return str(self)
+
+
+def join_steps(moves) -> list:
+    '''Объединение подряд идущих прыжков одной цепочки взятия в полные ходы
+    (прыжок продолжает цепочку, если оба со взятием и он начинается там, где кончился предыдущий)'''
+    joined = []
+    for move in moves:
+        if joined and move.captured and joined[-1].captured and \
+                (move.from_x, move.from_y) == (joined[-1].to_x, joined[-1].to_y):
+            previous = joined[-1]
+            joined[-1] = Move(previous.from_x, previous.from_y, move.to_x, move.to_y,
+                              previous.path + ((previous.to_x, previous.to_y),) + move.path,
+                              previous.captured + move.captured)
+        else:
+            joined.append(move)
+    return joined
+
+
+class MoveSet(tuple):
+    '''Неизменяемый (и хешируемый) набор ходов позиции с индексом по клетке начала очередного прыжка.
+
+    step_number - номер очередного прыжка: после прыжка в середине цепочки взятия
+    набор сужается методом after_step до ходов, продолжающих эту цепочку
+    '''
+
+    def __new__(cls, moves=(), step_number: int = 0):
+        move_set = super().__new__(cls, moves)
+        move_set.__step_number = step_number
+        # {(x, y): {(from_x, from_y, to_x, to_y): прыжок}} (строится при первом обращении)
+        move_set.__index = None
+        return move_set
+
+    @property
+    def step_number(self) -> int:
+        return self.__step_number
+
+    def __get_index(self) -> dict:
+        if self.__index is None:
+            self.__index = {}
+            for move in self:
+                steps = move.steps
+                if self.__step_number < len(steps):
+                    step = steps[self.__step_number]
+                    self.__index.setdefault((step.from_x, step.from_y), {}).setdefault(step[:4], step)
+        return self.__index
+
+    @property
+    def steps(self) -> list:
+        '''Различные очередные прыжки всех ходов'''
+        return [step for steps in self.__get_index().values() for step in steps.values()]
+
+    def steps_from(self, x: int, y: int) -> list:
+        '''Очередные прыжки с клетки'''
+        return list(self.__get_index().get((x, y), {}).values())
+
+    def targets(self, x: int, y: int) -> list:
+        '''Клетки окончания очередных прыжков с клетки: [(x, y), ...]'''
+        return [(step.to_x, step.to_y) for step in self.__get_index().get((x, y), {}).values()]
+
+    def find_step(self, from_x: int, from_y: int, to_x: int, to_y: int) -> Move:
+        '''Очередной прыжок по клеткам начала и окончания (None, если его нет)'''
+        return self.__get_index().get((from_x, from_y), {}).get((from_x, from_y, to_x, to_y))
+
+    def after_step(self, step: Move) -> 'MoveSet':
+        '''Ходы, продолжающиеся после совершённого прыжка'''
+        return MoveSet((move for move in self if move.steps[self.__step_number][:4] == step[:4]),
+                       self.__step_number + 1)
+
+    def is_finished(self) -> bool:
+        '''Совершены ли все прыжки (ход окончен)'''
+        return all(len(move.steps) <= self.__step_number for move in self)
@@ -0,0 +1,105 @@
+from checkers.move import Move
+
+
+# Количество ходов-убийц на каждый полуход
+KILLERS_PER_PLY = 2
+# Значение истории, после которого вся таблица уменьшается вдвое
+MAX_HISTORY_SCORE = 1 << 20
+
+# Приоритеты групп ходов (внутри группы ходы без взятия упорядочены по истории)
+TABLE_MOVE_PRIORITY = 1 << 30
+CAPTURE_PRIORITY = 1 << 28
+PROMOTION_PRIORITY = 1 << 27
+KILLER_PRIORITY = 1 << 26
+
+
+class KillerMoves:
+    '''Ходы без взятия, вызвавшие отсечение, для каждого полухода от корня'''
+
+    def __init__(self):
+        self.__killers = []
+
+    def clear(self):
+        self.__killers = []
+
+    def moves(self, ply: int) -> list:
+        '''Ходы-убийцы полухода (сначала последний)'''
+        return self.__killers[ply] if ply < len(self.__killers) else []
+
+    def store(self, ply: int, move: Move):
+        while len(self.__killers) <= ply:
+            self.__killers.append([])
+
+        killers = self.__killers[ply]
+        if move in killers:
+            killers.remove(move)
+        killers.insert(0, move)
+        del killers[KILLERS_PER_PLY:]
+
+
+class HistoryTable:
+    '''Успешность ходов без взятия по клеткам начала и конца хода'''
+
+    def __init__(self, squares_count: int):
+        self.__squares_count = squares_count
+        self.__scores = [0] * (squares_count * squares_count)
+
+    def clear(self):
+        self.__scores = [0] * (self.__squares_count * self.__squares_count)
+
+    def score(self, from_index: int, to_index: int) -> int:
+        return self.__scores[from_index * self.__squares_count + to_index]
+
+    def update(self, from_index: int, to_index: int, depth: int):
+        '''Учёт отсечения (более глубокие отсечения весят больше)'''
+        index = from_index * self.__squares_count + to_index
+        self.__scores[index] += depth * depth
+
+        if self.__scores[index] >= MAX_HISTORY_SCORE:
+            self.__scores = [score // 2 for score in self.__scores]
+
+
+class MovePicker:
+    '''Ленивый перебор ходов (вместе с номерами в порядке генерации) в порядке убывания приоритета:
+    лучший ход из таблицы транспозиций, взятия (больше шашек - раньше), превращения в дамку,
+    ходы-убийцы, остальные ходы по истории.
+
+    Очередной ход выбирается как наибольший из оставшихся, поэтому после отсечения
+    остаток списка не сортируется
+    '''
+
+    def __init__(self, field, moves_list: list, promotion_y: int, regular_bits: int, table_index: int = -1,
+                 killers: list = (), history: HistoryTable = None):
+        geometry = field.geometry
+        self.__moves = list(enumerate(moves_list))
+        self.__priorities = []
+
+        for index, move in self.__moves:
+            if index == table_index:
+                priority = TABLE_MOVE_PRIORITY
+            elif move.captured:
+                priority = CAPTURE_PRIORITY + len(move.captured)
+            else:
+                from_index = geometry.index(move.from_x, move.from_y)
+                if move.to_y == promotion_y and regular_bits >> from_index & 1:
+                    priority = PROMOTION_PRIORITY
+                elif move in killers:
+                    priority = KILLER_PRIORITY + KILLERS_PER_PLY - killers.index(move)
+                elif history is not None:
+                    priority = history.score(from_index, geometry.index(move.to_x, move.to_y))
+                else:
+                    priority = 0
+            self.__priorities.append(priority)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> tuple:
+        if not self.__moves:
+            raise StopIteration
+
+        best = max(range(len(self.__priorities)), key=self.__priorities.__getitem__)
+        self.__priorities[best] = self.__priorities[-1]
+        self.__priorities.pop()
+        self.__moves[best], self.__moves[-1] = self.__moves[-1], self.__moves[best]
+        return self.__moves.pop()
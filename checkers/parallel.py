@@ -0,0 +1,220 @@
+from functools import lru_cache
+from multiprocessing import Pool, Event
+from time import monotonic
+
+from checkers.move import Move
+from checkers.search import Search, SearchTimeout
+from checkers.stats import SearchStats
+from checkers.bitboard import iterate_bits
+from checkers.transposition import TranspositionTable, BOUND_EXACT
+from checkers.zobrist import position_key
+from checkers.constants import WIN_SCORE, TRANSPOSITION_TABLE_SIZE
+from checkers.enums import CheckerType, SideType
+
+
+# Меньшие глубины быстрее просчитать в одном процессе, чем раздавать процессам
+PARALLEL_MIN_DEPTH = 4
+
+# Состояние процесса пула: флаг остановки, размер таблицы транспозиций и игры по размерам поля и правилам
+_worker_stop_event = None
+_worker_table_size = TRANSPOSITION_TABLE_SIZE
+_worker_games = {}
+
+
+def _init_worker(stop_event, table_size: int):
+    global _worker_stop_event, _worker_table_size
+    _worker_stop_event = stop_event
+    _worker_table_size = table_size
+
+
+def field_bits(field) -> tuple:
+    '''Битовые маски поля для передачи в другой процесс'''
+    return field.white_regular_bits, field.black_regular_bits, field.white_queen_bits, field.black_queen_bits
+
+
+def set_field_bits(field, bits: tuple):
+    '''Расстановка шашек по битовым маскам (см. field_bits)'''
+    field.clear()
+    geometry = field.geometry
+    checker_types = (CheckerType.WHITE_REGULAR, CheckerType.BLACK_REGULAR,
+                     CheckerType.WHITE_QUEEN, CheckerType.BLACK_QUEEN)
+    for checker_type, checker_bits in zip(checker_types, bits):
+        for index in iterate_bits(checker_bits):
+            x, y = geometry.point(index)
+            field.set_type_at(x, y, checker_type)
+
+
+def score_root_move(task: tuple):
+    '''Оценка хода корня в процессе пула: (оценка, количество позиций) или None при остановке'''
+    # Импорт здесь: game импортирует этот модуль
+    from checkers.game import Game
+
+    # Задания, дождавшиеся очереди после остановки, не начинаются
+    if _worker_stop_event.is_set():
+        return None
+
+    x_size, y_size, rules, bits, side, move, depth, alpha, deadline = task
+
+    # Игра (и её таблица транспозиций) сохраняется между заданиями процесса
+    game = _worker_games.get((x_size, y_size, rules))
+    if game is None:
+        game = Game(x_size, y_size, rules)
+        game.transposition_table = TranspositionTable(_worker_table_size)
+        _worker_games[(x_size, y_size, rules)] = game
+    set_field_bits(game.field, bits)
+
+    search = game.create_search(workers=1, stop_event=_worker_stop_event)
+    try:
+        score = search.score_move(side, move, depth, alpha, deadline)
+    except SearchTimeout:
+        return None
+    return score, search.nodes
+
+
+@lru_cache(maxsize=None)
+def get_search_pool(workers: int) -> tuple:
+    '''Пул процессов поиска и его флаг остановки (один пул на количество процессов)'''
+    stop_event = Event()
+    pool = Pool(workers, initializer=_init_worker,
+                initargs=(stop_event, max(1, TRANSPOSITION_TABLE_SIZE // workers)))
+    return pool, stop_event
+
+
+class ParallelSearch:
+    '''Поиск с разделением ходов корня между процессами.
+
+    На каждой итерации углубления первый (лучший по предыдущей итерации) ход оценивается
+    в этом процессе, остальные - в процессах пула с его оценкой в качестве нижней границы.
+    Результат не зависит от порядка завершения заданий.
+    search должен останавливаться флагом пула (stop_event из get_search_pool), см. Game.create_search
+    '''
+
+    def __init__(self, game, search: Search, workers: int):
+        self.__game = game
+        self.__search = search
+        self.__workers = workers
+        self.__nodes = 0
+        self.__depth = 0
+        self.__stopped = False
+
+    @property
+    def depth(self) -> int:
+        '''Глубина последней завершённой итерации'''
+        return self.__depth
+
+    @property
+    def nodes(self) -> int:
+        '''Количество просмотренных позиций (во всех процессах)'''
+        return self.__nodes
+
+    @property
+    def stats(self) -> SearchStats:
+        '''Статистика последнего поиска (None, если не собирается). Счётчики позиций внутри поиска
+        и время этапов учитывают только ходы, оценённые в этом процессе'''
+        return self.__search.stats
+
+    def stop(self):
+        '''Остановка поиска (можно вызывать из другого потока): действует на текущий (или, если поиск
+        ещё не начат, на следующий) вызов search и сбрасывается по его окончании, как Search.stop'''
+        self.__stopped = True
+        get_search_pool(self.__workers)[1].set()
+
+    def search(self, side: SideType, max_depth: int, time_limit: float = None) -> Move:
+        '''Поиск лучшего хода стороны (None, если ходов нет), см. Search.search'''
+        stats = self.__search.stats
+        try:
+            if stats is None:
+                return self.__iterative_deepening(side, max_depth, time_limit)
+
+            stats.reset()
+            try:
+                return self.__iterative_deepening(side, max_depth, time_limit)
+            finally:
+                stats.finish(self.__nodes)
+        finally:
+            # Остановка сбрасывается только по окончании поиска, чтобы не потерять вызванную до его начала
+            self.__stopped = False
+            get_search_pool(self.__workers)[1].clear()
+
+    def __check_stopped(self):
+        '''Прерывание поиска между оценками ходов, если он остановлен'''
+        if self.__stopped:
+            raise SearchTimeout()
+
+    def __iterative_deepening(self, side: SideType, max_depth: int, time_limit: float = None) -> Move:
+        self.__nodes = 0
+        self.__depth = 0
+        # Срок общий для этого процесса и процессов пула (time.monotonic одно на всю систему)
+        deadline = None if time_limit is None else monotonic() + time_limit
+
+        pool = get_search_pool(self.__workers)[0]
+        self.__game.transposition_table.new_search()
+
+        moves_list = self.__search.root_moves(side)
+        if not moves_list:
+            return None
+
+        best_index, best_move = moves_list[0]
+
+        # Единственный ход не требует поиска
+        if len(moves_list) == 1:
+            return best_move
+
+        field = self.__game.field
+        bits = field_bits(field)
+
+        for depth in range(1, max_depth + 1):
+            scores = []
+
+            try:
+                # Первый ход задаёт нижнюю границу для остальных
+                self.__check_stopped()
+                first_score = self.__search.score_move(side, moves_list[0][1], depth, deadline=deadline)
+                self.__nodes += self.__search.nodes
+                scores.append(first_score)
+
+                if depth < PARALLEL_MIN_DEPTH:
+                    alpha = first_score
+                    for _, move in moves_list[1:]:
+                        self.__check_stopped()
+                        score = self.__search.score_move(side, move, depth, alpha, deadline)
+                        self.__nodes += self.__search.nodes
+                        scores.append(score)
+                        alpha = max(alpha, score)
+                else:
+                    tasks = [(field.x_size, field.y_size, field.rules, bits, side, move, depth, first_score,
+                              deadline) for _, move in moves_list[1:]]
+                    self.__check_stopped()
+                    results = pool.map(score_root_move, tasks, chunksize=1)
+                    if None in results:
+                        if self.stats is not None:
+                            self.stats.timed_out = True
+                        break
+                    for score, nodes in results:
+                        scores.append(score)
+                        self.__nodes += nodes
+            except SearchTimeout:
+                if self.stats is not None:
+                    self.stats.timed_out = True
+                break
+
+            # Лучший ход - первый с наибольшей оценкой (оценки не выше первой - лишь границы)
+            best_number = max(range(len(scores)), key=lambda number: (scores[number], -number))
+            best_index, best_move = moves_list[best_number]
+            best_score = scores[best_number]
+            self.__depth = depth
+            if self.stats is not None:
+                self.stats.finish_iteration(depth, self.__nodes)
+
+            # Порядок следующей итерации - по оценкам (устойчивая сортировка)
+            order = sorted(range(len(moves_list)), key=lambda number: (number != best_number, -scores[number]))
+            moves_list = [moves_list[number] for number in order]
+
+            transposition_table = self.__game.transposition_table
+            transposition_table.store(position_key(field, side), depth, best_score, BOUND_EXACT, best_index)
+
+            # Найден форсированный выигрыш или проигрыш
+            if abs(best_score) >= WIN_SCORE - max_depth:
+                break
+
+        return best_move
@@ -0,0 +1,131 @@
+from time import perf_counter
+
+from checkers.game import Game
+from checkers.enums import CheckerType, SideType
+
+
+# Обозначения шашек в текстовом описании позиции
+CHECKER_SYMBOLS = {
+    '.': CheckerType.NONE,
+    'w': CheckerType.WHITE_REGULAR,
+    'b': CheckerType.BLACK_REGULAR,
+    'W': CheckerType.WHITE_QUEEN,
+    'B': CheckerType.BLACK_QUEEN,
+}
+
+# Контрольные позиции: (строки поля сверху вниз, сторона хода, {глубина: количество позиций})
+# Полный ход со взятием нескольких шашек подряд считается одним узлом
+PERFT_POSITIONS = {
+    'initial': (
+        ['.b.b.b.b',
+         'b.b.b.b.',
+         '.b.b.b.b',
+         '........',
+         '........',
+         'w.w.w.w.',
+         '.w.w.w.w',
+         'w.w.w.w.'],
+        SideType.WHITE,
+        {1: 7, 2: 49, 3: 302, 4: 1469, 5: 7482, 6: 37986, 7: 190146},
+    ),
+    'kings': (
+        ['.B......',
+         '........',
+         '...b.b..',
+         '........',
+         '.....W..',
+         '..w.....',
+         '...W....',
+         '........'],
+        SideType.WHITE,
+        {1: 1, 2: 3, 3: 20, 4: 121, 5: 694, 6: 4769},
+    ),
+    'captures': (
+        ['........',
+         '..b.b...',
+         '.....w..',
+         '..b.b...',
+         '.w......',
+         '..b.b.b.',
+         '.w......',
+         'W.......'],
+        SideType.WHITE,
+        {1: 18, 2: 31, 3: 155, 4: 568, 5: 3433, 6: 12257},
+    ),
+    'promotion': (
+        ['........',
+         '..b.b.b.',
+         '.w......',
+         '........',
+         '...b....',
+         '....w...',
+         '.....b..',
+         '........'],
+        SideType.BLACK,
+        {1: 1, 2: 2, 3: 14, 4: 26, 5: 115, 6: 148},
+    ),
+    'endgame': (
+        ['.......B',
+         '........',
+         '........',
+         '..W.....',
+         '........',
+         '........',
+         '.b......',
+         'W.......'],
+        SideType.BLACK,
+        {1: 6, 2: 51, 3: 234, 4: 1530, 5: 9122, 6: 78469},
+    ),
+    # Международные шашки (правила по умолчанию для поля 10x10)
+    'international': (
+        ['.b.b.b.b.b',
+         'b.b.b.b.b.',
+         '.b.b.b.b.b',
+         'b.b.b.b.b.',
+         '..........',
+         '..........',
+         '.w.w.w.w.w',
+         'w.w.w.w.w.',
+         '.w.w.w.w.w',
+         'w.w.w.w.w.'],
+        SideType.WHITE,
+        {1: 9, 2: 81, 3: 658, 4: 4265, 5: 27117, 6: 167140},
+    ),
+}
+
+
+def game_from_rows(rows: list) -> Game:
+    '''Создание игры с позицией из текстового описания поля'''
+    game = Game(len(rows[0]), len(rows))
+    for y, row in enumerate(rows):
+        for x, symbol in enumerate(row):
+            game.field.set_type_at(x, y, CHECKER_SYMBOLS[symbol])
+    return game
+
+
+def perft(game: Game, side: SideType, depth: int) -> int:
+    '''Количество позиций на заданной глубине (в полных ходах)'''
+    moves_list = game.get_moves_list(side)
+    if depth <= 1:
+        return len(moves_list) if depth == 1 else 1
+
+    nodes = 0
+    for move in moves_list:
+        game.make_move(move)
+        nodes += perft(game, SideType.opposite(side), depth - 1)
+        game.unmake_move()
+
+    return nodes
+
+
+def run_perft(name: str, max_depth: int):
+    '''Подсчёт позиций контрольной позиции по глубинам: [(глубина, позиций, ожидалось, секунд)]'''
+    rows, side, expected_nodes = PERFT_POSITIONS[name]
+    game = game_from_rows(rows)
+
+    results = []
+    for depth in range(1, max_depth + 1):
+        start_time = perf_counter()
+        nodes = perft(game, side, depth)
+        results.append((depth, nodes, expected_nodes.get(depth), perf_counter() - start_time))
+    return results
@@ -0,0 +1,238 @@
+import re
+import struct
+from pathlib import Path
+from typing import NamedTuple
+
+from checkers.game import Game
+from checkers.bitboard import get_geometry
+from checkers.rules import get_rules
+from checkers.move import Move
+from checkers.enums import SideType
+
+
+# Результаты партии (как в headless.play_game): победитель или ничья (None - партия не окончена)
+RESULTS = (None, 'white', 'black', 'draw')
+
+# Журнал партий: метка формата, затем записи, дописываемые в конец файла.
+# Запись: длина тела, размер поля по x и y, код результата (номер в RESULTS), количество ходов;
+# затем для каждого хода - количество клеток остановки и их индексы (клетки съеденных шашек
+# восстанавливаются при воспроизведении)
+LOG_MAGIC = b'CHKLOG01'
+LOG_RECORD_HEADER = struct.Struct('<IBBBxH')
+
+# Результаты в PDN (2 очка за победу)
+PDN_RESULTS = {'white': '2-0', 'black': '0-2', 'draw': '1-1', None: '*'}
+# Тип игры PDN: номер варианта (по правилам), белые ходят первыми, размер поля, алгебраическая нотация
+PDN_GAME_TYPE = '{},W,{},{},A0,0'
+
+
+class GameRecord(NamedTuple):
+    '''Запись партии от начальной позиции (по правилам по умолчанию для размера поля)'''
+    x_size: int
+    y_size: int
+    # Полные ходы (со всеми клетками остановки и съеденными шашками)
+    moves: tuple
+    # Победитель ('white', 'black'), 'draw' или None, если партия не окончена
+    result: str = None
+
+
+def record_from_game(game: Game, result: str = None) -> GameRecord:
+    '''Запись партии по истории ходов игры'''
+    return GameRecord(game.field.x_size, game.field.y_size, tuple(game.history), result)
+
+
+def record_from_result(result: dict, x_size: int, y_size: int) -> GameRecord:
+    '''Запись партии по результату headless.play_game'''
+    return replay_record(GameRecord(x_size, y_size, (), result['winner']), result['turns'])
+
+
+def replay_record(record: GameRecord, stops_list) -> GameRecord:
+    '''Восстановление полных ходов записи по клеткам остановки каждого хода'''
+    game = Game(record.x_size, record.y_size)
+    side = SideType.WHITE
+    moves = []
+    for number, stops in enumerate(stops_list):
+        move = game.find_move(side, stops)
+        if move is None:
+            raise ValueError(f'Недопустимый ход {number + 1}: {stops}')
+        game.make_move(move)
+        moves.append(move)
+        side = SideType.opposite(side)
+    return record._replace(moves=tuple(moves))
+
+
+def iterate_positions(record: GameRecord):
+    '''Ленивое воспроизведение партии: (поле, сторона хода, ход) для каждой позиции перед ходом.
+    Поле одно на всю партию и изменяется после перехода к следующей позиции'''
+    game = Game(record.x_size, record.y_size)
+    side = SideType.WHITE
+    for move in record.moves:
+        yield game.field, side, move
+        game.make_move(move)
+        side = SideType.opposite(side)
+
+
+# Журнал партий
+
+def write_log_record(log_file, record: GameRecord):
+    '''Запись партии в открытый на запись двоичный журнал'''
+    geometry = get_geometry(record.x_size, record.y_size)
+    body = bytearray()
+    for move in record.moves:
+        stops = move.stops
+        body.append(len(stops))
+        body += bytes(geometry.index(x, y) for x, y in stops)
+    log_file.write(LOG_RECORD_HEADER.pack(LOG_RECORD_HEADER.size - 4 + len(body), record.x_size, record.y_size,
+                                          RESULTS.index(record.result), len(record.moves)))
+    log_file.write(body)
+
+
+def append_records(path, records):
+    '''Дописывание партий в конец журнала (файл создаётся, если его нет)'''
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'ab') as log_file:
+        if log_file.tell() == 0:
+            log_file.write(LOG_MAGIC)
+        for record in records:
+            write_log_record(log_file, record)
+
+
+def read_log(path):
+    '''Потоковое чтение журнала: партии по одной, с восстановленными полными ходами'''
+    with open(path, 'rb') as log_file:
+        if log_file.read(len(LOG_MAGIC)) != LOG_MAGIC:
+            raise ValueError(f'Файл {path} не является журналом партий')
+
+        while True:
+            header = log_file.read(LOG_RECORD_HEADER.size)
+            if not header:
+                return
+            if len(header) < LOG_RECORD_HEADER.size:
+                raise ValueError(f'Журнал {path} обрезан')
+
+            body_size, x_size, y_size, result_code, moves_count = LOG_RECORD_HEADER.unpack(header)
+            expected_size = body_size - (LOG_RECORD_HEADER.size - 4)
+            if expected_size < 0 or result_code >= len(RESULTS):
+                raise ValueError(f'Запись журнала {path} повреждена')
+            body = log_file.read(expected_size)
+            # Например, если программа завершилась посреди дописывания партии
+            if len(body) < expected_size:
+                raise ValueError(f'Журнал {path} обрезан')
+
+            geometry = get_geometry(x_size, y_size)
+            stops_list = []
+            offset = 0
+            for _ in range(moves_count):
+                if offset >= len(body) or offset + 1 + body[offset] > len(body):
+                    raise ValueError(f'Запись журнала {path} повреждена')
+                stops_count = body[offset]
+                stops_list.append([geometry.point(index) for index in body[offset + 1:offset + 1 + stops_count]])
+                offset += 1 + stops_count
+            if offset != len(body):
+                raise ValueError(f'Запись журнала {path} повреждена')
+
+            record = GameRecord(x_size, y_size, (), RESULTS[result_code])
+            yield replay_record(record, stops_list)
+
+
+# PDN
+
+def square_name(x: int, y: int, y_size: int) -> str:
+    '''Алгебраическое имя клетки (a1 - левый нижний угол, со стороны белых)'''
+    return f'{chr(ord("a") + x)}{y_size - y}'
+
+
+def parse_square(name: str, y_size: int) -> tuple:
+    '''Координаты клетки по алгебраическому имени'''
+    return ord(name[0]) - ord('a'), y_size - int(name[1:])
+
+
+def move_to_pdn(move: Move, y_size: int) -> str:
+    '''Запись хода в PDN: c3-d4 (ход) или c3:e5:g3 (взятие)'''
+    separator = ':' if move.captured else '-'
+    return separator.join(square_name(x, y, y_size) for x, y in move.stops)
+
+
+def record_to_pdn(record: GameRecord, tags: dict = None) -> str:
+    '''Партия в формате PDN'''
+    rules = get_rules(record.x_size, record.y_size)
+    all_tags = {'GameType': PDN_GAME_TYPE.format(rules.pdn_game_type, record.x_size, record.y_size)}
+    all_tags.update(tags or {})
+    all_tags['Result'] = PDN_RESULTS[record.result]
+
+    lines = [f'[{name} "{value}"]' for name, value in all_tags.items()]
+    lines.append('')
+
+    tokens = []
+    for number, move in enumerate(record.moves):
+        if number % 2 == 0:
+            tokens.append(f'{number // 2 + 1}.')
+        tokens.append(move_to_pdn(move, record.y_size))
+    tokens.append(PDN_RESULTS[record.result])
+
+    # Строки не длиннее 80 символов
+    line = ''
+    for token in tokens:
+        if line and len(line) + 1 + len(token) > 80:
+            lines.append(line)
+            line = token
+        else:
+            line = f'{line} {token}' if line else token
+    lines.append(line)
+
+    return '\n'.join(lines) + '\n'
+
+
+PDN_TAG = re.compile(r'\[(\w+)\s+"([^"]*)"\]')
+PDN_COMMENT = re.compile(r'\{[^}]*\}|\([^)]*\)')
+PDN_MOVE = re.compile(r'^[a-z]\d+([-:x][a-z]\d+)+$')
+
+
+def parse_pdn_game(text: str) -> GameRecord:
+    '''Разбор одной партии PDN'''
+    tags = dict(PDN_TAG.findall(text))
+    x_size, y_size = 8, 8
+    if 'GameType' in tags:
+        game_type = tags['GameType'].split(',')
+        if len(game_type) >= 4:
+            x_size, y_size = int(game_type[2]), int(game_type[3])
+
+    result = {value: key for key, value in PDN_RESULTS.items()}.get(tags.get('Result', '*'))
+
+    stops_list = []
+    for token in PDN_COMMENT.sub(' ', PDN_TAG.sub(' ', text)).split():
+        # Номер хода может быть записан слитно с ходом (1.c3-d4)
+        token = re.sub(r'^\d+\.+', '', token)
+        if PDN_MOVE.match(token):
+            stops_list.append([parse_square(name, y_size) for name in re.split('[-:x]', token)])
+        elif token in PDN_RESULTS.values():
+            result = {value: key for key, value in PDN_RESULTS.items()}[token]
+
+    return replay_record(GameRecord(x_size, y_size, (), result), stops_list)
+
+
+def read_pdn(path):
+    '''Потоковое чтение файла PDN: партии по одной (партия начинается с блока тегов)'''
+    with open(path, encoding='utf-8') as pdn_file:
+        lines = []
+        has_moves = False
+        for line in pdn_file:
+            stripped = line.strip()
+            if stripped.startswith('[') and has_moves:
+                yield parse_pdn_game(''.join(lines))
+                lines, has_moves = [], False
+            if stripped and not stripped.startswith('['):
+                has_moves = True
+            lines.append(line)
+
+        if has_moves:
+            yield parse_pdn_game(''.join(lines))
+
+
+def write_pdn(path, records):
+    '''Запись партий в файл PDN'''
+    with open(path, 'w', encoding='utf-8') as pdn_file:
+        for record in records:
+            pdn_file.write(record_to_pdn(record))
+            pdn_file.write('\n')
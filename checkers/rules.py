@@ -0,0 +1,48 @@
+from typing import NamedTuple
+
+
+class Rules(NamedTuple):
+    '''Правила игры (размер поля задаётся отдельно)'''
+    # Дамка ходит и бьёт на любое расстояние по диагонали (иначе - на одну клетку, как обычная шашка)
+    flying_kings: bool = True
+    # Обычная шашка бьёт и назад
+    men_capture_backwards: bool = True
+    # Из нескольких взятий обязательно то, в котором съедается больше шашек
+    max_capture: bool = False
+    # Шашка, дошедшая до края посреди взятия, продолжает его дамкой
+    # (иначе превращается, только если закончила ход на краю)
+    promote_during_capture: bool = True
+    # Съеденные шашки снимаются с поля только после окончания хода (правило «турецкого удара»):
+    # до этого через них нельзя перепрыгнуть повторно (иначе снимаются сразу после прыжка)
+    remove_captured_after_move: bool = True
+    # Количество рядов обычных шашек каждой стороны в начале партии (None - по высоте поля)
+    men_rows: int = None
+    # Номер типа игры в PDN
+    pdn_game_type: int = 25
+
+    def initial_rows(self, y_size: int) -> int:
+        '''Количество рядов обычных шашек каждой стороны (между сторонами остаются два пустых ряда)'''
+        return (y_size - 2) // 2 if self.men_rows is None else self.men_rows
+
+
+# Русские шашки (8x8)
+RUSSIAN_RULES = Rules()
+# Международные шашки (10x10)
+INTERNATIONAL_RULES = Rules(max_capture=True, promote_during_capture=False, pdn_game_type=20)
+# Канадские шашки (12x12)
+CANADIAN_RULES = Rules(max_capture=True, promote_during_capture=False, pdn_game_type=27)
+
+# Варианты игры: название -> (размер по x, размер по y, правила)
+VARIANTS = {
+    'russian': (8, 8, RUSSIAN_RULES),
+    'international': (10, 10, INTERNATIONAL_RULES),
+    'canadian': (12, 12, CANADIAN_RULES),
+}
+
+
+def get_rules(x_size: int, y_size: int) -> Rules:
+    '''Правила по умолчанию для размера поля (варианта с таким полем или русские)'''
+    for variant_x_size, variant_y_size, rules in VARIANTS.values():
+        if (variant_x_size, variant_y_size) == (x_size, y_size):
+            return rules
+    return RUSSIAN_RULES
@@ -0,0 +1,358 @@
+from time import monotonic
+
+from checkers.constants import WIN_SCORE, QUIESCENCE_MAX_DEPTH
+from checkers.enums import SideType
+from checkers.move import Move
+from checkers.transposition import TranspositionTable, BOUND_EXACT, BOUND_LOWER, BOUND_UPPER
+from checkers.tablebase import Tablebase, TABLEBASE_DRAW, is_win_distance
+from checkers.evaluation import Evaluator
+from checkers.ordering import MovePicker, KillerMoves, HistoryTable
+from checkers.stats import SearchStats, timed
+from checkers.zobrist import position_key
+
+
+# Оценки выше этой границы означают форсированный выигрыш
+WIN_SCORE_THRESHOLD = WIN_SCORE - 1000
+
+# Проверка времени выполняется раз в столько позиций (маска)
+TIME_CHECK_MASK = 0x3F
+
+
+class SearchTimeout(Exception):
+    '''Исчерпано время, отведённое на поиск, или поиск остановлен'''
+
+
+def score_to_table(score: int, ply: int) -> int:
+    '''Оценка выигрыша для таблицы транспозиций (расстояние считается от текущей позиции)'''
+    if score >= WIN_SCORE_THRESHOLD:
+        return score + ply
+    if score <= -WIN_SCORE_THRESHOLD:
+        return score - ply
+    return score
+
+
+def score_from_table(score: int, ply: int) -> int:
+    '''Оценка выигрыша из таблицы транспозиций (расстояние считается от корня)'''
+    if score >= WIN_SCORE_THRESHOLD:
+        return score - ply
+    if score <= -WIN_SCORE_THRESHOLD:
+        return score + ply
+    return score
+
+
+class Search:
+    '''Поиск оптимального хода (negamax с альфа-бета отсечением и итеративным углублением).
+
+    Листья основного поиска, в которых есть обязательное взятие, досчитываются поиском
+    только по взятиям (не глубже quiescence_depth полуходов), чтобы не оценивать позицию
+    посреди размена.
+
+    Если передана статистика (stats), поиск заполняет её счётчики, а генерация ходов,
+    выполнение ходов, оценка и обращения к базе эндшпиля замеряются по времени
+    '''
+
+    def __init__(self, game, transposition_table: TranspositionTable = None, tablebase: Tablebase = None,
+                 evaluator: Evaluator = None, stop_event=None, stats: SearchStats = None,
+                 quiescence_depth: int = QUIESCENCE_MAX_DEPTH):
+        self.__game = game
+        self.__transposition_table = transposition_table
+        self.__tablebase = tablebase
+        self.__evaluator = Evaluator() if evaluator is None else evaluator
+        self.__killers = KillerMoves()
+        self.__history = HistoryTable(game.field.geometry.squares_count)
+        self.__nodes = 0
+        self.__depth = 0
+        self.__deadline = None
+        self.__stopped = False
+        # Общий флаг остановки (например, multiprocessing.Event для поиска в нескольких процессах)
+        self.__stop_event = stop_event
+        self.__quiescence_depth = quiescence_depth
+
+        self.__stats = stats
+        self.__make_move = game.make_move
+        self.__unmake_move = game.unmake_move
+        self.__get_moves_list = game.get_moves_list
+        self.__get_captures_list = game.get_required_moves_list
+        self.__has_quiet_moves = game.has_optional_moves
+        self.__evaluate = self.__evaluator.evaluate
+        self.__probe_tablebase = None if tablebase is None else tablebase.probe
+        # Замеры времени подключаются заменой функций, чтобы без статистики поиск не замедлялся
+        if stats is not None:
+            self.__make_move = timed(self.__make_move, stats, 'make_move')
+            self.__unmake_move = timed(self.__unmake_move, stats, 'make_move')
+            self.__get_moves_list = timed(self.__get_moves_list, stats, 'move_generation')
+            self.__get_captures_list = timed(self.__get_captures_list, stats, 'move_generation')
+            self.__has_quiet_moves = timed(self.__has_quiet_moves, stats, 'move_generation')
+            self.__evaluate = timed(self.__evaluate, stats, 'evaluation')
+            if tablebase is not None:
+                self.__probe_tablebase = timed(self.__probe_tablebase, stats, 'tablebase')
+
+    @property
+    def depth(self) -> int:
+        '''Глубина последней завершённой итерации'''
+        return self.__depth
+
+    @property
+    def nodes(self) -> int:
+        '''Количество просмотренных позиций'''
+        return self.__nodes
+
+    @property
+    def stats(self) -> SearchStats:
+        '''Статистика последнего поиска (None, если не собирается)'''
+        return self.__stats
+
+    def stop(self):
+        '''Остановка поиска (можно вызывать из другого потока): поиск вернёт лучший ход
+        последней завершённой итерации. Остановка действует на текущий (или, если поиск ещё
+        не начат, на следующий) вызов search и сбрасывается по его окончании.
+        score_move остановку не сбрасывает: оценку отдельных ходов останавливают общим флагом
+        stop_event, который сбрасывает его владелец по окончании всего поиска'''
+        self.__stopped = True
+
+    def search(self, side: SideType, max_depth: int, time_limit: float = None) -> Move:
+        '''Поиск лучшего хода стороны (None, если ходов нет).
+
+        Если задано время (в секундах), поиск углубляется, пока оно не истечёт,
+        и возвращает лучший ход последней завершённой итерации.
+        '''
+        try:
+            if self.__stats is None:
+                return self.__iterative_deepening(side, max_depth, time_limit)
+
+            self.__stats.reset()
+            try:
+                return self.__iterative_deepening(side, max_depth, time_limit)
+            finally:
+                self.__stats.finish(self.__nodes)
+        finally:
+            self.__stopped = False
+
+    def __iterative_deepening(self, side: SideType, max_depth: int, time_limit: float = None) -> Move:
+        '''Итеративное углубление: лучший ход предыдущей итерации проверяется первым'''
+        self.__nodes = 0
+        self.__depth = 0
+        self.__deadline = None if time_limit is None else monotonic() + time_limit
+        if self.__transposition_table is not None:
+            self.__transposition_table.new_search()
+
+        self.__killers.clear()
+        self.__history.clear()
+
+        moves_list = list(self.__order_moves(side, self.__game.get_legal_moves(side)))
+        if not moves_list:
+            return None
+
+        best_index, best_move = moves_list[0]
+
+        # Единственный ход не требует поиска
+        if len(moves_list) == 1:
+            return best_move
+
+        for depth in range(1, max_depth + 1):
+            alpha, beta = -WIN_SCORE - 1, WIN_SCORE + 1
+            best_score = -WIN_SCORE - 1
+            iteration_index, iteration_move = best_index, best_move
+
+            try:
+                for index, move in moves_list:
+                    score = -self.__search_move(move, SideType.opposite(side), depth - 1, -beta, -alpha, 1)
+
+                    if score > best_score:
+                        best_score = score
+                        iteration_index, iteration_move = index, move
+                    alpha = max(alpha, score)
+            except SearchTimeout:
+                if self.__stats is not None:
+                    self.__stats.timed_out = True
+                break
+
+            best_index, best_move = iteration_index, iteration_move
+            self.__depth = depth
+            if self.__stats is not None:
+                self.__stats.finish_iteration(depth, self.__nodes)
+
+            moves_list.remove((best_index, best_move))
+            moves_list.insert(0, (best_index, best_move))
+
+            if self.__transposition_table is not None:
+                self.__transposition_table.store(position_key(self.__game.field, side), depth, best_score,
+                                                 BOUND_EXACT, best_index)
+
+            # Найден форсированный выигрыш или проигрыш
+            if abs(best_score) >= WIN_SCORE - max_depth:
+                break
+
+        return best_move
+
+    def root_moves(self, side: SideType) -> list:
+        '''Ходы стороны (вместе с номерами в порядке генерации) в порядке проверки'''
+        return list(self.__order_moves(side, self.__game.get_legal_moves(side)))
+
+    def score_move(self, side: SideType, move: Move, depth: int, alpha: int = -WIN_SCORE - 1,
+                   deadline: float = None) -> int:
+        '''Оценка хода стороны поиском на глубину depth (в полуходах, включая сам ход).
+
+        deadline - момент окончания поиска по time.monotonic() (общий для всех процессов, поэтому
+        задание, дождавшееся своей очереди в пуле, не получает время заново).
+        Оценки не выше alpha - лишь верхние границы. При истечении времени или остановке
+        выбрасывается SearchTimeout
+        '''
+        self.__nodes = 0
+        self.__deadline = deadline
+        return -self.__search_move(move, SideType.opposite(side), depth - 1, -WIN_SCORE - 1, -alpha, 1)
+
+    def __search_move(self, move: Move, side: SideType, depth: int, alpha: int, beta: int, ply: int) -> int:
+        '''Оценка позиции после хода'''
+        self.__make_move(move)
+
+        try:
+            return self.__negamax(side, depth, alpha, beta, ply)
+        finally:
+            self.__unmake_move()
+
+    def __count_node(self):
+        '''Учёт позиции с периодической проверкой времени и остановки'''
+        self.__nodes += 1
+
+        if not (self.__nodes & TIME_CHECK_MASK) and \
+                (self.__stopped or (self.__deadline is not None and monotonic() >= self.__deadline) or
+                 (self.__stop_event is not None and self.__stop_event.is_set())):
+            raise SearchTimeout()
+
+    def __negamax(self, side: SideType, depth: int, alpha: int, beta: int, ply: int) -> int:
+        '''Negamax с альфа-бета отсечением'''
+        self.__count_node()
+
+        stats = self.__stats
+
+        # Точная оценка позиции из базы эндшпиля
+        field = self.__game.field
+        if self.__tablebase is not None and \
+                field.white_checkers_count + field.black_checkers_count <= self.__tablebase.max_pieces:
+            value = self.__probe_tablebase(field, side)
+            if value is not None:
+                if stats is not None:
+                    stats.tablebase_hits += 1
+                if value == TABLEBASE_DRAW:
+                    return 0
+                distance = value - 1
+                if is_win_distance(distance):
+                    return WIN_SCORE - ply - distance
+                return -WIN_SCORE + ply + distance
+
+        if depth <= 0:
+            return self.__quiescence(side, alpha, beta, self.__quiescence_depth, ply)
+
+        # Проверка таблицы транспозиций
+        table_index = -1
+        if self.__transposition_table is not None:
+            key = position_key(self.__game.field, side)
+            entry = self.__transposition_table.probe(key)
+            if stats is not None:
+                stats.table_probes += 1
+                stats.table_hits += entry is not None
+            if entry is not None:
+                table_depth, table_score, table_bound, table_index = entry
+                if table_depth >= depth:
+                    table_score = score_from_table(table_score, ply)
+                    if table_bound == BOUND_EXACT or \
+                            (table_bound == BOUND_LOWER and table_score >= beta) or \
+                            (table_bound == BOUND_UPPER and table_score <= alpha):
+                        if stats is not None:
+                            stats.table_cutoffs += 1
+                        return table_score
+
+        moves_list = self.__get_moves_list(side)
+        if stats is not None:
+            stats.interior_nodes += 1
+            stats.moves_generated += len(moves_list)
+
+        # Нет ходов - поражение (чем позже, тем лучше)
+        if not moves_list:
+            return -WIN_SCORE + ply
+
+        original_alpha = alpha
+        best_score = -WIN_SCORE - 1
+        best_index = -1
+        for move_number, (index, move) in enumerate(self.__order_moves(side, moves_list, table_index, ply)):
+            score = -self.__search_move(move, SideType.opposite(side), depth - 1, -beta, -alpha, ply + 1)
+
+            if score > best_score:
+                best_score = score
+                best_index = index
+                if score > alpha:
+                    alpha = score
+                    # Отсечение: противник не допустит этой позиции
+                    if alpha >= beta:
+                        if stats is not None:
+                            stats.beta_cutoffs += 1
+                            stats.first_move_cutoffs += move_number == 0
+                        # Ход без взятия запоминается для упорядочивания в соседних позициях
+                        if not move.captured:
+                            self.__killers.store(ply, move)
+                            self.__history.update(field.geometry.index(move.from_x, move.from_y),
+                                                  field.geometry.index(move.to_x, move.to_y), depth)
+                        break
+
+        if self.__transposition_table is not None:
+            if best_score <= original_alpha:
+                bound = BOUND_UPPER
+            elif best_score >= beta:
+                bound = BOUND_LOWER
+            else:
+                bound = BOUND_EXACT
+            self.__transposition_table.store(key, depth, score_to_table(best_score, ply), bound, best_index)
+
+        return best_score
+
+    def __quiescence(self, side: SideType, alpha: int, beta: int, depth: int, ply: int) -> int:
+        '''Поиск только по взятиям: позиция оценивается, когда взятий больше нет.
+        Взятие обязательно, поэтому оценка до взятия (как нижняя граница) не используется'''
+        stats = self.__stats
+        field = self.__game.field
+
+        captures_list = self.__get_captures_list(side) if depth > 0 else []
+        if not captures_list:
+            if stats is not None:
+                stats.leaf_nodes += 1
+            # Нет ходов - поражение, как в __negamax (на пределе глубины взятия не искались,
+            # поэтому проверяется только отсутствие шашек)
+            if not field.side_bits(side) or (depth > 0 and not self.__has_quiet_moves(side)):
+                return -WIN_SCORE + ply
+            return self.__evaluate(field, side)
+
+        if stats is not None:
+            stats.quiescence_nodes += 1
+
+        # Взятия большего количества шашек - раньше
+        captures_list.sort(key=lambda move: -len(move.captured))
+
+        best_score = -WIN_SCORE - 1
+        for move in captures_list:
+            self.__make_move(move)
+            try:
+                self.__count_node()
+                score = -self.__quiescence(SideType.opposite(side), -beta, -alpha, depth - 1, ply + 1)
+            finally:
+                self.__unmake_move()
+
+            if score > best_score:
+                best_score = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+
+        return best_score
+
+    def __order_moves(self, side: SideType, moves_list: list, table_index: int = -1, ply: int = 0) -> MovePicker:
+        '''Ленивый перебор ходов в порядке приоритета (см. MovePicker)'''
+        field = self.__game.field
+        if side == SideType.WHITE:
+            promotion_y, regular_bits = 0, field.white_regular_bits
+        else:
+            promotion_y, regular_bits = field.y_size - 1, field.black_regular_bits
+
+        return MovePicker(field, moves_list, promotion_y, regular_bits, table_index,
+                          self.__killers.moves(ply), self.__history)
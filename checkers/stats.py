@@ -0,0 +1,133 @@
+import json
+from time import perf_counter
+
+
+# Этапы поиска, время которых замеряется
+SEARCH_PHASES = ('move_generation', 'make_move', 'evaluation', 'tablebase')
+
+
+class SearchStats:
+    '''Счётчики и замеры времени поиска одного хода.
+
+    Поиск заполняет их, только если статистика ему передана (Search(stats=...)),
+    поэтому без неё накладные расходы - одна проверка на None в каждой позиции
+    '''
+
+    def __init__(self):
+        # Словарь времён этапов не пересоздаётся: на него ссылаются замеряющие обёртки (timed)
+        self.phase_times = dict.fromkeys(SEARCH_PHASES, 0.0)
+        self.reset()
+
+    def reset(self):
+        '''Сброс перед поиском следующего хода'''
+        # Позиции: все, внутренние (с перебором ходов) и листья (статическая оценка)
+        self.nodes = 0
+        self.interior_nodes = 0
+        self.leaf_nodes = 0
+        # Позиции поиска только по взятиям (после основного поиска)
+        self.quiescence_nodes = 0
+        # Сгенерированные ходы во внутренних позициях (для среднего ветвления)
+        self.moves_generated = 0
+        # Отсечения: всего и на первом же ходе (качество упорядочивания)
+        self.beta_cutoffs = 0
+        self.first_move_cutoffs = 0
+        # Таблица транспозиций: обращения, найденные записи и отсечения по ним
+        self.table_probes = 0
+        self.table_hits = 0
+        self.table_cutoffs = 0
+        self.tablebase_hits = 0
+        # Глубина и количество позиций каждой завершённой итерации углубления
+        self.iterations = []
+        self.__iterations_nodes = 0
+        self.depth = 0
+        self.book_move = False
+        self.timed_out = False
+        self.elapsed_time = 0.0
+        # Время этапов (в секундах)
+        for phase in SEARCH_PHASES:
+            self.phase_times[phase] = 0.0
+        self.__start_time = perf_counter()
+
+    def finish_iteration(self, depth: int, nodes: int):
+        '''Завершение итерации углубления (nodes - позиций с начала поиска)'''
+        self.depth = depth
+        self.iterations.append((depth, nodes - self.__iterations_nodes))
+        self.__iterations_nodes = nodes
+
+    def finish(self, nodes: int = None):
+        '''Завершение поиска хода (nodes - общее количество позиций, если считается не здесь)'''
+        self.elapsed_time = perf_counter() - self.__start_time
+        if nodes is not None:
+            self.nodes = nodes
+
+    @property
+    def branching_factor(self) -> float:
+        '''Среднее количество ходов во внутренней позиции'''
+        return self.moves_generated / self.interior_nodes if self.interior_nodes else 0.0
+
+    @property
+    def effective_branching_factor(self) -> float:
+        '''Рост количества позиций последней итерации углубления относительно предыдущей'''
+        if len(self.iterations) < 2 or not self.iterations[-2][1]:
+            return 0.0
+        return self.iterations[-1][1] / self.iterations[-2][1]
+
+    @property
+    def cutoff_rate(self) -> float:
+        '''Доля внутренних позиций, завершившихся отсечением'''
+        return self.beta_cutoffs / self.interior_nodes if self.interior_nodes else 0.0
+
+    @property
+    def first_move_cutoff_rate(self) -> float:
+        '''Доля отсечений на первом ходе'''
+        return self.first_move_cutoffs / self.beta_cutoffs if self.beta_cutoffs else 0.0
+
+    @property
+    def table_hit_rate(self) -> float:
+        '''Доля обращений к таблице транспозиций, нашедших запись'''
+        return self.table_hits / self.table_probes if self.table_probes else 0.0
+
+    @property
+    def nodes_per_second(self) -> float:
+        return self.nodes / self.elapsed_time if self.elapsed_time else 0.0
+
+    def to_dict(self) -> dict:
+        '''Статистика для записи в JSON'''
+        return {
+            'depth': self.depth,
+            'nodes': self.nodes,
+            'interior_nodes': self.interior_nodes,
+            'leaf_nodes': self.leaf_nodes,
+            'quiescence_nodes': self.quiescence_nodes,
+            'elapsed_time': round(self.elapsed_time, 6),
+            'nodes_per_second': round(self.nodes_per_second),
+            'branching_factor': round(self.branching_factor, 3),
+            'effective_branching_factor': round(self.effective_branching_factor, 3),
+            'cutoff_rate': round(self.cutoff_rate, 3),
+            'first_move_cutoff_rate': round(self.first_move_cutoff_rate, 3),
+            'table_hit_rate': round(self.table_hit_rate, 3),
+            'table_cutoffs': self.table_cutoffs,
+            'tablebase_hits': self.tablebase_hits,
+            'iterations': [list(iteration) for iteration in self.iterations],
+            'phase_times': {phase: round(time, 6) for phase, time in self.phase_times.items()},
+            'book_move': self.book_move,
+            'timed_out': self.timed_out,
+        }
+
+    def to_json(self) -> str:
+        '''Статистика одной строкой JSON (для журналов)'''
+        return json.dumps(self.to_dict())
+
+
+def timed(function, stats: SearchStats, phase: str):
+    '''Обёртка функции, добавляющая время её выполнения к этапу статистики'''
+    phase_times = stats.phase_times
+
+    def timed_function(*args):
+        start_time = perf_counter()
+        try:
+            return function(*args)
+        finally:
+            phase_times[phase] += perf_counter() - start_time
+
+    return timed_function
@@ -0,0 +1,156 @@
+import mmap
+import struct
+from functools import lru_cache
+from math import comb
+from pathlib import Path
+
+from checkers.bitboard import iterate_bits
+from checkers.enums import SideType
+
+
+# Формат файла среза (одного набора материала): заголовок, затем по байту на позицию -
+# сначала все позиции с ходом белых, затем с ходом чёрных
+TABLEBASE_MAGIC = b'CHKTB001'
+# Заголовок: метка формата, размер поля по x и y, материал (белые шашки, белые дамки,
+# чёрные шашки, чёрные дамки), количество позиций для каждой стороны
+TABLEBASE_HEADER = struct.Struct('<8sBB4BxxI')
+
+# Значение позиции: 0 - ничья (или позиция невозможна),
+# иначе (расстояние до конца партии в полуходах + 1); нечётное расстояние - выигрыш стороны хода,
+# чётное - проигрыш (0 - ходов нет)
+TABLEBASE_DRAW = 0
+# Наибольшее хранимое расстояние
+MAX_TABLEBASE_DISTANCE = 254
+
+
+def is_win_distance(distance: int) -> bool:
+    '''Выигрывает ли сторона хода при данном расстоянии до конца партии'''
+    return distance % 2 == 1
+
+
+def slice_file_name(material: tuple) -> str:
+    '''Имя файла среза по материалу (белые шашки, белые дамки, чёрные шашки, чёрные дамки)'''
+    return 'tb-{}{}{}{}.bin'.format(*material)
+
+
+def slice_size(material: tuple, squares_count: int) -> int:
+    '''Количество расстановок материала на поле (для одной стороны хода)'''
+    size = 1
+    for count in material:
+        size *= comb(squares_count, count)
+        squares_count -= count
+    return size
+
+
+def position_index(groups: list, squares_count: int) -> int:
+    '''Номер расстановки: groups - отсортированные индексы клеток белых шашек, белых дамок,
+    чёрных шашек и чёрных дамок. Каждая группа нумеруется сочетанием среди клеток,
+    не занятых предыдущими группами'''
+    index = 0
+    taken = []
+    free_count = squares_count
+
+    for squares in groups:
+        rank = 0
+        for number, square in enumerate(squares):
+            # Номер клетки среди свободных
+            position = square
+            for taken_square in taken:
+                if taken_square < square:
+                    position -= 1
+            rank += comb(position, number + 1)
+
+        index = index * comb(free_count, len(squares)) + rank
+        free_count -= len(squares)
+        taken += squares
+
+    return index
+
+
+def field_material(field) -> tuple:
+    '''Материал на поле (белые шашки, белые дамки, чёрные шашки, чёрные дамки)'''
+    return (field.white_regular_count, field.white_queen_count,
+            field.black_regular_count, field.black_queen_count)
+
+
+def field_groups(field) -> list:
+    '''Индексы клеток шашек поля по группам материала'''
+    return [list(iterate_bits(field.white_regular_bits)), list(iterate_bits(field.white_queen_bits)),
+            list(iterate_bits(field.black_regular_bits)), list(iterate_bits(field.black_queen_bits))]
+
+
+class TablebaseSlice:
+    '''Срез базы эндшпиля, отображённый в память'''
+
+    def __init__(self, path):
+        with open(path, 'rb') as slice_file:
+            self.__mmap = mmap.mmap(slice_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self.__x_size, self.__y_size, *material, self.__size = TABLEBASE_HEADER.unpack_from(self.__mmap, 0)
+        self.__material = tuple(material)
+        if magic != TABLEBASE_MAGIC or TABLEBASE_HEADER.size + 2 * self.__size > len(self.__mmap):
+            self.__mmap.close()
+            raise ValueError(f'Файл {path} не является срезом базы эндшпиля')
+
+    @property
+    def x_size(self) -> int:
+        return self.__x_size
+
+    @property
+    def y_size(self) -> int:
+        return self.__y_size
+
+    @property
+    def material(self) -> tuple:
+        return self.__material
+
+    def value(self, side: SideType, index: int) -> int:
+        '''Значение позиции (см. TABLEBASE_DRAW)'''
+        if side == SideType.BLACK:
+            index += self.__size
+        return self.__mmap[TABLEBASE_HEADER.size + index]
+
+
+class Tablebase:
+    '''База эндшпиля: срезы для всех наборов материала до max_pieces шашек (открываются по требованию)'''
+
+    def __init__(self, directory, x_size: int, y_size: int, max_pieces: int):
+        self.__directory = Path(directory)
+        self.__x_size = x_size
+        self.__y_size = y_size
+        self.__max_pieces = max_pieces
+        self.__slices = {}
+
+    @property
+    def max_pieces(self) -> int:
+        return self.__max_pieces
+
+    def get_slice(self, material: tuple) -> TablebaseSlice:
+        '''Срез для набора материала (None, если его нет или он построен для другого размера поля)'''
+        if material not in self.__slices:
+            path = self.__directory / slice_file_name(material)
+            tablebase_slice = TablebaseSlice(path) if path.is_file() else None
+            if tablebase_slice is not None and \
+                    (tablebase_slice.x_size, tablebase_slice.y_size) != (self.__x_size, self.__y_size):
+                tablebase_slice = None
+            self.__slices[material] = tablebase_slice
+        return self.__slices[material]
+
+    def probe(self, field, side: SideType):
+        '''Значение позиции (см. TABLEBASE_DRAW) или None, если позиции нет в базе'''
+        if field.x_size != self.__x_size or field.y_size != self.__y_size or \
+                field.white_checkers_count + field.black_checkers_count > self.__max_pieces:
+            return None
+
+        tablebase_slice = self.get_slice(field_material(field))
+        if tablebase_slice is None:
+            return None
+        return tablebase_slice.value(side, position_index(field_groups(field), field.geometry.squares_count))
+
+
+@lru_cache(maxsize=None)
+def get_tablebase(directory, x_size: int, y_size: int, max_pieces: int) -> Tablebase:
+    '''База эндшпиля (одна на процесс) или None, если каталога нет'''
+    if not Path(directory).is_dir():
+        return None
+    return Tablebase(directory, x_size, y_size, max_pieces)
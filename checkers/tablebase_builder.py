@@ -0,0 +1,164 @@
+import os
+from itertools import combinations
+
+from checkers.game import Game
+from checkers.enums import CheckerType, SideType
+from checkers.tablebase import TABLEBASE_MAGIC, TABLEBASE_HEADER, TABLEBASE_DRAW, MAX_TABLEBASE_DISTANCE, \
+    Tablebase, is_win_distance, slice_file_name, slice_size, position_index, field_material, field_groups
+
+
+# Типы шашек групп материала (в порядке групп)
+MATERIAL_TYPES = (CheckerType.WHITE_REGULAR, CheckerType.WHITE_QUEEN,
+                  CheckerType.BLACK_REGULAR, CheckerType.BLACK_QUEEN)
+
+
+def material_levels(max_pieces: int) -> list:
+    '''Наборы материала, сгруппированные в порядке построения.
+
+    Взятие уменьшает общее число шашек, превращение - число обычных шашек,
+    поэтому наборы упорядочены по (всего шашек, обычных шашек); наборы одного уровня
+    не зависят друг от друга и могут строиться параллельно
+    '''
+    levels = {}
+    for pieces in range(2, max_pieces + 1):
+        for white_regular in range(pieces + 1):
+            for white_queen in range(pieces + 1 - white_regular):
+                for black_regular in range(pieces + 1 - white_regular - white_queen):
+                    black_queen = pieces - white_regular - white_queen - black_regular
+                    if white_regular + white_queen == 0 or black_regular + black_queen == 0:
+                        continue
+                    material = (white_regular, white_queen, black_regular, black_queen)
+                    levels.setdefault((pieces, white_regular + black_regular), []).append(material)
+
+    return [levels[level] for level in sorted(levels)]
+
+
+def iterate_placements(material: tuple, squares_count: int):
+    '''Перебор всех расстановок материала: группы индексов клеток'''
+
+    def place(group_number: int, free_squares: list, groups: list):
+        if group_number == len(material):
+            yield groups
+            return
+
+        for squares in combinations(free_squares, material[group_number]):
+            remaining = [square for square in free_squares if square not in squares]
+            yield from place(group_number + 1, remaining, groups + [list(squares)])
+
+    yield from place(0, list(range(squares_count)), [])
+
+
+def solve_slice(directory, x_size: int, y_size: int, material: tuple) -> str:
+    '''Построение среза базы для набора материала (пропускается, если файл уже есть).
+
+    Ретроградный анализ итерациями по расстоянию: позиция выиграна за n полуходов,
+    если есть ход в позицию, проигранную за n - 1; проиграна за n, если все ходы ведут
+    в выигранные позиции, и самый долгий из них - за n - 1. Позиции других срезов
+    (после взятия или превращения) берутся из уже построенных файлов
+    '''
+    path = os.path.join(directory, slice_file_name(material))
+    if os.path.exists(path):
+        return path
+
+    game = Game(x_size, y_size)
+    field = game.field
+    geometry = field.geometry
+    squares_count = geometry.squares_count
+    size = slice_size(material, squares_count)
+    tablebase = Tablebase(directory, x_size, y_size, sum(material))
+
+    values = bytearray(2 * size)
+    # Нерешённые позиции: [(номер значения, номера значений дочерних позиций среза, расстояния других срезов)]
+    # (None среди расстояний - ничья в другом срезе)
+    unresolved = []
+    max_known_distance = 0
+
+    for groups in iterate_placements(material, squares_count):
+        # Обычные шашки не могут стоять на строке превращения
+        if any(geometry.point(square).y == 0 for square in groups[0]) or \
+                any(geometry.point(square).y == y_size - 1 for square in groups[2]):
+            continue
+
+        field.clear()
+        for checker_type, squares in zip(MATERIAL_TYPES, groups):
+            for square in squares:
+                x, y = geometry.point(square)
+                field.set_type_at(x, y, checker_type)
+        index = position_index(groups, squares_count)
+
+        for side_number, side in enumerate((SideType.WHITE, SideType.BLACK)):
+            value_index = side_number * size + index
+            moves_list = game.get_moves_list(side)
+
+            # Нет ходов - проигрыш
+            if not moves_list:
+                values[value_index] = 1
+                continue
+
+            slice_children, other_distances = [], []
+            for move in moves_list:
+                game.make_move(move)
+                child_side = SideType.opposite(side)
+                child_material = field_material(field)
+
+                # У противника не осталось шашек
+                if field.checkers_count(child_side) == 0:
+                    other_distances.append(0)
+                elif child_material == material:
+                    child_index = position_index(field_groups(field), squares_count)
+                    slice_children.append((1 - side_number) * size + child_index)
+                else:
+                    child_value = tablebase.probe(field, child_side)
+                    if child_value is None:
+                        raise FileNotFoundError(f'Нет среза базы для материала {child_material}')
+                    other_distances.append(None if child_value == TABLEBASE_DRAW else child_value - 1)
+                    if child_value != TABLEBASE_DRAW:
+                        max_known_distance = max(max_known_distance, child_value - 1)
+
+                game.unmake_move()
+
+            unresolved.append((value_index, slice_children, other_distances))
+
+    # Итерации по расстоянию до конца партии
+    distance = 1
+    last_change = 0
+    while unresolved and distance <= MAX_TABLEBASE_DISTANCE:
+        still_unresolved = []
+        for position in unresolved:
+            value_index, slice_children, other_distances = position
+            child_distances = other_distances + [values[child] - 1 if values[child] else None
+                                                 for child in slice_children]
+
+            # Выигрыш: есть ход в проигранную позицию
+            if is_win_distance(distance):
+                losses = [child for child in child_distances if child is not None and not is_win_distance(child)]
+                if losses and min(losses) + 1 == distance:
+                    values[value_index] = distance + 1
+                    continue
+
+            # Проигрыш: все ходы ведут в выигранные позиции
+            elif None not in child_distances and all(is_win_distance(child) for child in child_distances) and \
+                    max(child_distances) + 1 == distance:
+                values[value_index] = distance + 1
+                continue
+
+            still_unresolved.append(position)
+
+        if len(still_unresolved) != len(unresolved):
+            last_change = distance
+            max_known_distance = max(max_known_distance, distance)
+        unresolved = still_unresolved
+
+        # Новых решений больше не будет
+        if distance > max_known_distance + 1 and distance - last_change >= 2:
+            break
+        distance += 1
+
+    # Запись во временный файл и переименование, чтобы прерванное построение не оставило битый срез
+    temporary_path = path + '.tmp'
+    with open(temporary_path, 'wb') as slice_file:
+        slice_file.write(TABLEBASE_HEADER.pack(TABLEBASE_MAGIC, x_size, y_size, *material, size))
+        slice_file.write(values)
+    os.replace(temporary_path, path)
+
+    return path
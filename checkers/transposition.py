@@ -0,0 +1,80 @@
+from array import array
+
+from checkers.constants import TRANSPOSITION_TABLE_SIZE
+
+
+# Типы оценки, хранимой в таблице
+BOUND_EXACT = 0
+BOUND_LOWER = 1
+BOUND_UPPER = 2
+
+# Размер одной записи (ключ + упакованные данные) в байтах
+ENTRY_SIZE = 16
+# Смещение оценки для хранения в беззнаковом поле
+SCORE_OFFSET = 1 << 31
+
+
+class TranspositionTable:
+    '''Таблица транспозиций фиксированного размера.
+
+    Записи сгруппированы в корзины по две: первая ячейка замещается только более
+    глубоким (или устаревшим) результатом, вторая - всегда.
+    Данные записи упакованы в одно 64-битное число:
+    оценка (32 бита) | глубина (8 бит) | тип оценки (2 бита) | номер лучшего хода + 1 (12 бит) | поколение (8 бит)
+    '''
+
+    def __init__(self, size_mb: int = TRANSPOSITION_TABLE_SIZE):
+        # Количество корзин - степень двойки, чтобы индекс получался маской
+        buckets_count = 1
+        while buckets_count * 2 * 2 * ENTRY_SIZE <= size_mb * 1024 * 1024:
+            buckets_count *= 2
+
+        self.__mask = buckets_count - 1
+        self.__keys = array('Q', bytes(buckets_count * 2 * 8))
+        self.__data = array('Q', bytes(buckets_count * 2 * 8))
+        self.__generation = 0
+
+    @property
+    def entries_count(self) -> int:
+        '''Количество ячеек таблицы'''
+        return len(self.__keys)
+
+    def new_search(self):
+        '''Начало нового поиска (записи прошлых поисков становятся устаревшими)'''
+        self.__generation = (self.__generation + 1) & 0xFF
+
+    def clear(self):
+        '''Очистка таблицы'''
+        self.__keys = array('Q', bytes(len(self.__keys) * 8))
+        self.__data = array('Q', bytes(len(self.__data) * 8))
+        self.__generation = 0
+
+    def probe(self, key: int):
+        '''Поиск записи: (глубина, оценка, тип оценки, номер лучшего хода) или None'''
+        index = (key & self.__mask) << 1
+        if self.__keys[index] == key:
+            data = self.__data[index]
+        elif self.__keys[index + 1] == key:
+            data = self.__data[index + 1]
+        else:
+            return None
+
+        return ((data >> 32) & 0xFF, (data & 0xFFFFFFFF) - SCORE_OFFSET,
+                (data >> 40) & 0x3, ((data >> 42) & 0xFFF) - 1)
+
+    def store(self, key: int, depth: int, score: int, bound: int, best_index: int = -1):
+        '''Сохранение результата поиска позиции'''
+        index = (key & self.__mask) << 1
+        data = (score + SCORE_OFFSET) | (depth << 32) | (bound << 40) | \
+               ((best_index + 1) << 42) | (self.__generation << 54)
+
+        # Ячейка с приоритетом глубины
+        stored_data = self.__data[index]
+        if self.__keys[index] == key or depth >= (stored_data >> 32) & 0xFF or \
+                (stored_data >> 54) != self.__generation:
+            self.__keys[index] = key
+            self.__data[index] = data
+        # Ячейка, замещаемая всегда
+        else:
+            self.__keys[index + 1] = key
+            self.__data[index + 1] = data
@@ -0,0 +1,96 @@
+from checkers.game import Game
+from checkers.evaluation import FEATURE_NAMES, extract_features
+from checkers.constants import RANDOM_OPENING_TURNS
+from checkers.enums import SideType
+
+
+# Результат партии с точки зрения белых
+GAME_RESULTS = {'white': 1.0, 'black': 0.0, 'draw': 0.5}
+
+# Начальный шаг изменения весов (затем уменьшается вдвое, пока не станет меньше 1)
+INITIAL_TUNING_STEP = 16
+
+
+def collect_samples(results, x_size: int, y_size: int, skip_turns: int = RANDOM_OPENING_TURNS) -> list:
+    '''Спокойные позиции (без обязательного взятия) из записей партий selfplay.py:
+    [(значения признаков, результат партии с точки зрения белых)]'''
+    samples = []
+    for result in results:
+        outcome = GAME_RESULTS[result['winner']]
+        game = Game(x_size, y_size)
+        side = SideType.WHITE
+
+        for turn_number, stops in enumerate(result['turns']):
+            if turn_number >= skip_turns and not game.get_required_moves_list(side):
+                samples.append((extract_features(game.field), outcome))
+
+            move = game.find_move(side, stops)
+            if move is None:
+                raise ValueError(f'Недопустимый ход {stops} в партии {result.get("seed")}')
+            game.make_move(move)
+            side = SideType.opposite(side)
+
+    return samples
+
+
+def expected_result(score: int, scaling: float) -> float:
+    '''Ожидаемый результат партии по оценке позиции (логистическая кривая)'''
+    return 1 / (1 + 10 ** (-scaling * score / 400))
+
+
+def mean_error(samples: list, weights_list: list, scaling: float) -> float:
+    '''Средний квадрат отклонения ожидаемого результата от настоящего'''
+    error = 0.0
+    for features, outcome in samples:
+        score = sum(weight * value for weight, value in zip(weights_list, features))
+        error += (outcome - expected_result(score, scaling)) ** 2
+    return error / len(samples)
+
+
+def find_scaling(samples: list, weights_list: list) -> float:
+    '''Масштаб логистической кривой, при котором ошибка текущих весов минимальна'''
+    best_scaling, best_error = 1.0, mean_error(samples, weights_list, 1.0)
+    step = 0.5
+    while step >= 0.01:
+        improved = False
+        for scaling in (best_scaling - step, best_scaling + step):
+            if scaling > 0:
+                error = mean_error(samples, weights_list, scaling)
+                if error < best_error:
+                    best_scaling, best_error, improved = scaling, error, True
+        if not improved:
+            step /= 2
+    return best_scaling
+
+
+def tune_weights(samples: list, weights: dict, max_iterations: int = 100, fixed: tuple = ('man',)):
+    '''Подбор весов покоординатным спуском (метод Texel).
+
+    Веса из fixed не меняются (задают масштаб оценки). Генератор: после каждой итерации
+    возвращает (номер итерации, ошибка, веса); останавливается, когда шаг становится меньше 1
+    '''
+    weights_list = [weights[name] for name in FEATURE_NAMES]
+    scaling = find_scaling(samples, weights_list)
+    best_error = mean_error(samples, weights_list, scaling)
+    step = INITIAL_TUNING_STEP
+
+    for iteration in range(1, max_iterations + 1):
+        improved = False
+        for number, name in enumerate(FEATURE_NAMES):
+            if name in fixed:
+                continue
+
+            for delta in (step, -step):
+                candidate = list(weights_list)
+                candidate[number] += delta
+                error = mean_error(samples, candidate, scaling)
+                if error < best_error:
+                    weights_list, best_error, improved = candidate, error, True
+                    break
+
+        yield iteration, best_error, dict(zip(FEATURE_NAMES, weights_list))
+
+        if not improved:
+            step //= 2
+            if step < 1:
+                break
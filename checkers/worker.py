@@ -0,0 +1,66 @@
+from threading import Thread
+
+from checkers.move import Move
+from checkers.enums import SideType
+
+
+class SearchWorker:
+    '''Поиск хода компьютера в фоновом потоке.
+
+    Поиск идёт по копии игры, поэтому поле основной игры можно читать (отрисовывать),
+    пока компьютер думает. Результат забирается опросом (is_done / move)
+    '''
+
+    def __init__(self, game, side: SideType, time_limit: float = None, max_depth: int = None):
+        self.__game = game.copy()
+        self.__side = side
+        self.__time_limit = time_limit
+        self.__max_depth = max_depth
+        self.__search = self.__game.create_search()
+        self.__cancelled = False
+        self.__move = None
+        self.__error = None
+        self.__done = False
+        self.__thread = Thread(target=self.__run, daemon=True)
+
+    def start(self):
+        self.__thread.start()
+
+    def __run(self):
+        try:
+            self.__move = self.__game.predict_optimal_moves(self.__side, self.__time_limit, self.__max_depth,
+                                                            self.__search)
+        except Exception as error:
+            # Ошибка передаётся в основной поток: отсутствие хода означало бы, что ходов нет
+            self.__error = error
+        finally:
+            self.__done = True
+
+    def is_done(self) -> bool:
+        '''Завершён ли поиск'''
+        return self.__done
+
+    @property
+    def cancelled(self) -> bool:
+        return self.__cancelled
+
+    @property
+    def error(self) -> Exception:
+        '''Исключение, прервавшее поиск (None, если поиск завершился без ошибки)'''
+        return self.__error
+
+    @property
+    def move(self) -> Move:
+        '''Найденный ход (None, если поиск ещё идёт, отменён или ходов нет)'''
+        if self.__cancelled or not self.is_done():
+            return None
+        return self.__move
+
+    def move_now(self):
+        '''Завершить поиск досрочно с лучшим ходом последней завершённой итерации'''
+        self.__search.stop()
+
+    def cancel(self):
+        '''Отменить поиск (результат будет отброшен)'''
+        self.__cancelled = True
+        self.__search.stop()
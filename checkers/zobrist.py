@@ -0,0 +1,44 @@
+from functools import lru_cache
+from random import Random
+
+from checkers.enums import CheckerType, SideType
+
+
+# Зерно генератора ключей (ключи должны совпадать во всех процессах)
+ZOBRIST_SEED = 0x5A0B
+
+
+class ZobristKeys:
+    '''Случайные 64-битные ключи для хеширования позиции по Зобристу'''
+
+    def __init__(self, squares_count: int):
+        random = Random(ZOBRIST_SEED + squares_count)
+
+        self.__keys = {
+            checker_type: [random.getrandbits(64) for _ in range(squares_count)]
+            for checker_type in (CheckerType.WHITE_REGULAR, CheckerType.BLACK_REGULAR,
+                                 CheckerType.WHITE_QUEEN, CheckerType.BLACK_QUEEN)
+        }
+        self.__side_key = random.getrandbits(64)
+
+    def keys(self, checker_type: CheckerType) -> list:
+        '''Ключи клеток для типа шашки'''
+        return self.__keys[checker_type]
+
+    @property
+    def side_key(self) -> int:
+        '''Ключ хода чёрных'''
+        return self.__side_key
+
+
+@lru_cache(maxsize=None)
+def get_zobrist_keys(squares_count: int) -> ZobristKeys:
+    '''Получение (единственных для каждого размера доски) ключей'''
+    return ZobristKeys(squares_count)
+
+
+def position_key(field, side: SideType) -> int:
+    '''Хеш позиции с учётом очерёдности хода'''
+    if side == SideType.BLACK:
+        return field.hash ^ get_zobrist_keys(field.geometry.squares_count).side_key
+    return field.hash
@@ -0,0 +1,40 @@
+import argparse
+from itertools import chain
+
+from checkers.records import read_log, read_pdn, write_pdn, append_records
+from checkers.constants import GAME_LOG_PATH
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Преобразование записей партий: журнал, PDN, массивы NumPy')
+    parser.add_argument('inputs', nargs='*', default=[str(GAME_LOG_PATH)],
+                        help='журналы партий или файлы PDN (*.pdn)')
+    parser.add_argument('--pdn', default=None, help='файл PDN для записи партий')
+    parser.add_argument('--log', default=None, help='журнал, в который дописываются партии')
+    parser.add_argument('--npz', default=None, help='каталог для выгрузки позиций в файлы .npz')
+    parser.add_argument('--shard-size', type=int, default=None, help='количество позиций в файле .npz')
+    return parser.parse_args()
+
+
+def read_records(paths):
+    '''Потоковое чтение партий из журналов и файлов PDN'''
+    return chain.from_iterable(read_pdn(path) if path.lower().endswith('.pdn') else read_log(path)
+                               for path in paths)
+
+
+def main():
+    args = parse_args()
+
+    if args.pdn is not None:
+        write_pdn(args.pdn, read_records(args.inputs))
+    if args.log is not None:
+        append_records(args.log, read_records(args.inputs))
+    if args.npz is not None:
+        # Импорт здесь: для остальных преобразований NumPy не нужен
+        from checkers.export import export_npz, EXPORT_SHARD_SIZE
+        positions_count = export_npz(read_records(args.inputs), args.npz, args.shard_size or EXPORT_SHARD_SIZE)
+        print(f'Позиций: {positions_count}')
+
+
+if __name__ == '__main__':
+    main()
@@ -19,6 +19,14 @@ def main():
 
     main_canvas.bind("<Motion>", ui.mouse_move)
     main_canvas.bind("<Button-1>", ui.mouse_down)
+    # Пробел - компьютер ходит сразу, не дожидаясь конца поиска
+    main_window.bind("<space>", ui.move_now)
+
+    def close():
+        ui.cancel_search()
+        main_window.destroy()
+
+    main_window.protocol("WM_DELETE_WINDOW", close)
 
     main_window.mainloop()
 
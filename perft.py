@@ -0,0 +1,37 @@
+import argparse
+import sys
+
+from checkers.perft import PERFT_POSITIONS, run_perft
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Проверка и замер скорости генерации ходов (perft)')
+    parser.add_argument('positions', nargs='*', default=list(PERFT_POSITIONS),
+                        help='контрольные позиции (по умолчанию - все)')
+    parser.add_argument('-d', '--depth', type=int, default=5, help='максимальная глубина')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    has_errors = False
+
+    for name in args.positions:
+        for depth, nodes, expected_nodes, elapsed_time in run_perft(name, args.depth):
+            if expected_nodes is None:
+                status = '?'
+            elif nodes == expected_nodes:
+                status = 'OK'
+            else:
+                status = f'ОШИБКА (ожидалось {expected_nodes})'
+                has_errors = True
+
+            nodes_per_second = nodes / elapsed_time if elapsed_time else 0
+            print(f'{name:<10} глубина {depth:>2}  позиций {nodes:>10}  {elapsed_time:8.3f} с  '
+                  f'{nodes_per_second:12.0f} поз/с  {status}', flush=True)
+
+    sys.exit(1 if has_errors else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+import argparse
+import cProfile
+import json
+import pstats
+import os
+import sys
+from functools import partial
+from multiprocessing import Pool
+
+from checkers.headless import play_game
+from checkers.records import record_from_result, append_records
+from checkers.constants import X_SIZE, Y_SIZE, MAX_GAME_TURNS, RANDOM_OPENING_TURNS
+
+
+# Количество строк профиля, выводимых после партий
+PROFILE_LINES = 30
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Партии компьютера против компьютера без интерфейса')
+    parser.add_argument('-n', '--games', type=int, default=100, help='количество партий')
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count(), help='количество процессов')
+    parser.add_argument('-d', '--depth', type=int, default=None, help='глубина поиска (в полуходах)')
+    parser.add_argument('-t', '--time', type=float, default=None, help='время на ход (в секундах)')
+    parser.add_argument('-s', '--seed', type=int, default=0, help='зерно первой партии')
+    parser.add_argument('--opening-turns', type=int, default=RANDOM_OPENING_TURNS,
+                        help='количество случайных ходов в начале партии')
+    parser.add_argument('--max-turns', type=int, default=MAX_GAME_TURNS, help='ходов до объявления ничьей')
+    parser.add_argument('--size', type=int, nargs=2, default=(X_SIZE, Y_SIZE), metavar=('X', 'Y'),
+                        help='размер поля')
+    parser.add_argument('-o', '--output', default='-', help='файл результатов JSON lines (- для stdout)')
+    parser.add_argument('-l', '--log', default=None, help='журнал партий, в который дописываются сыгранные партии')
+    parser.add_argument('--stats', action='store_true', help='добавить в результаты статистику поиска каждого хода')
+    parser.add_argument('--profile', nargs='?', const='selfplay.prof', default=None, metavar='FILE',
+                        help='сыграть партии в одном процессе под cProfile и сохранить профиль в файл')
+    return parser.parse_args()
+
+
+def write_result(args, output, result: dict):
+    output.write(json.dumps(result) + '\n')
+    output.flush()
+    if args.log is not None:
+        append_records(args.log, [record_from_result(result, *args.size)])
+
+
+def main():
+    args = parse_args()
+
+    play = partial(play_game, max_depth=args.depth, time_limit=args.time, opening_turns=args.opening_turns,
+                   max_turns=args.max_turns, x_size=args.size[0], y_size=args.size[1], collect_stats=args.stats)
+    seeds = range(args.seed, args.seed + args.games)
+
+    output = sys.stdout if args.output == '-' else open(args.output, 'a', encoding='utf-8')
+    try:
+        if args.profile is not None:
+            # Профилировать можно только свой процесс, поэтому партии играются по очереди
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                for result in map(play, seeds):
+                    write_result(args, output, result)
+            finally:
+                profiler.disable()
+                profiler.dump_stats(args.profile)
+                pstats.Stats(profiler, stream=sys.stderr).sort_stats('cumulative').print_stats(PROFILE_LINES)
+        else:
+            with Pool(args.workers) as pool:
+                for result in pool.imap_unordered(play, seeds):
+                    write_result(args, output, result)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+import argparse
+import json
+
+from checkers.evaluation import load_weights, save_weights
+from checkers.tuner import collect_samples, tune_weights
+from checkers.constants import X_SIZE, Y_SIZE, RANDOM_OPENING_TURNS, EVALUATION_WEIGHTS_PATH
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Подбор весов оценки позиции по партиям selfplay.py')
+    parser.add_argument('games', nargs='+', help='файлы результатов selfplay.py (JSON lines)')
+    parser.add_argument('-i', '--iterations', type=int, default=100, help='наибольшее количество итераций')
+    parser.add_argument('--skip-turns', type=int, default=RANDOM_OPENING_TURNS,
+                        help='количество пропускаемых первых ходов каждой партии')
+    parser.add_argument('--size', type=int, nargs=2, default=(X_SIZE, Y_SIZE), metavar=('X', 'Y'),
+                        help='размер поля')
+    parser.add_argument('-o', '--output', default=str(EVALUATION_WEIGHTS_PATH),
+                        help='файл весов (начальные веса тоже берутся из него)')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    x_size, y_size = args.size
+
+    samples = []
+    for games_path in args.games:
+        with open(games_path, encoding='utf-8') as games_file:
+            results = (json.loads(line) for line in games_file if line.strip())
+            samples += collect_samples(results, x_size, y_size, args.skip_turns)
+    print(f'Позиций: {len(samples)}', flush=True)
+
+    weights = load_weights(args.output)
+    for iteration, error, weights in tune_weights(samples, weights, args.iterations):
+        print(f'Итерация {iteration:3}  ошибка {error:.6f}  {weights}', flush=True)
+        # Веса сохраняются после каждой итерации, чтобы прерванный подбор не пропал
+        save_weights(args.output, weights)
+
+
+if __name__ == '__main__':
+    main()